@@ -1,11 +1,20 @@
 import datetime
+import fnmatch
+import gzip
 import hashlib
 import io
+import itertools
 import logging
+import operator
+import os
 import re
+import tempfile
 import warnings
 import weakref
-from functools import partial
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from pathlib import Path
 
 import asdf
 import numpy as np
@@ -33,43 +42,48 @@ if asdf.versioning.default_version > "1.5.0":
 else:
     _NDARRAY_TAG = "tag:stsci.edu:asdf/core/ndarray-1.0.0"
 
-_builtin_regexes = [
-    "",
-    "NAXIS[0-9]{0,3}",
-    "BITPIX",
-    "XTENSION",
-    "PCOUNT",
-    "GCOUNT",
-    "EXTEND",
-    "BSCALE",
-    "BZERO",
-    "BLANK",
-    "DATAMAX",
-    "DATAMIN",
-    "EXTNAME",
-    "EXTVER",
-    "EXTLEVEL",
-    "GROUPS",
-    "PYTPE[0-9]",
-    "PSCAL[0-9]",
-    "PZERO[0-9]",
-    "SIMPLE",
-    "TFIELDS",
-    "TBCOL[0-9]{1,3}",
-    "TFORM[0-9]{1,3}",
-    "TTYPE[0-9]{1,3}",
-    "TUNIT[0-9]{1,3}",
-    "TSCAL[0-9]{1,3}",
-    "TZERO[0-9]{1,3}",
-    "TNULL[0-9]{1,3}",
-    "TDISP[0-9]{1,3}",
-    "HISTORY",
-]
-
-
-_builtin_regex = re.compile("|".join(f"(^{x}$)" for x in _builtin_regexes))
-
-
+_BUILTIN_KEYWORDS = frozenset(
+    [
+        "",
+        "BITPIX",
+        "XTENSION",
+        "PCOUNT",
+        "GCOUNT",
+        "EXTEND",
+        "BSCALE",
+        "BZERO",
+        "BLANK",
+        "DATAMAX",
+        "DATAMIN",
+        "EXTNAME",
+        "EXTVER",
+        "EXTLEVEL",
+        "GROUPS",
+        "SIMPLE",
+        "TFIELDS",
+        "HISTORY",
+    ]
+)
+
+# Builtin keywords numbered by a suffix, as the minimum and maximum
+# number of digits following each 5 character prefix.
+_BUILTIN_KEYWORD_PREFIXES = {
+    "NAXIS": (0, 3),
+    "PYTPE": (1, 1),
+    "PSCAL": (1, 1),
+    "PZERO": (1, 1),
+    "TBCOL": (1, 3),
+    "TFORM": (1, 3),
+    "TTYPE": (1, 3),
+    "TUNIT": (1, 3),
+    "TSCAL": (1, 3),
+    "TZERO": (1, 3),
+    "TNULL": (1, 3),
+    "TDISP": (1, 3),
+}
+
+
+@lru_cache(maxsize=4096)
 def is_builtin_fits_keyword(key):
     """
     Check if key is a FITS builtin.
@@ -87,7 +101,17 @@ def is_builtin_fits_keyword(key):
     bool
         `True` if the keyword is a built-in FITS keyword.
     """
-    return _builtin_regex.match(key) is not None
+    if key in _BUILTIN_KEYWORDS:
+        return True
+    digits = _BUILTIN_KEYWORD_PREFIXES.get(key[:5])
+    if digits is None:
+        return False
+    suffix = key[5:]
+    return (
+        digits[0] <= len(suffix) <= digits[1]
+        and suffix.isascii()
+        and (not suffix or suffix.isdigit())
+    )
 
 
 _keyword_indices = [
@@ -100,6 +124,15 @@ _keyword_indices = [
 # Key where the FITS hash is stored in the ASDF tree
 FITS_HASH_KEY = "_fits_hash"
 
+# Key where the algorithm used for the FITS hash is stored in the ASDF tree.
+# Files written before this was recorded used "sha256".
+FITS_HASH_ALGORITHM_KEY = "_fits_hash_algorithm"
+
+# Algorithm used for new files, see fits_hash
+FITS_HASH_ALGORITHM = "sha256-header-blocks"
+
+_FITS_HASH_ALGORITHMS = ("sha256", "sha256-header-blocks")
+
 
 def _get_indexed_keyword(keyword, i):
     for sub, max_value, r in _keyword_indices:
@@ -144,7 +177,7 @@ def _get_hdu_pair(hdu_name, index=None):
     return pair
 
 
-def get_hdu(hdulist, hdu_name, index=None, _cache=None):
+def get_hdu(hdulist, hdu_name, index=None, _hdus=None):
     """
     Retrieve an HDU from an hdulist.
 
@@ -156,8 +189,8 @@ def get_hdu(hdulist, hdu_name, index=None, _cache=None):
         The name of the HDU to retrieve
     index : int, optional
         The index of the HDU to retrieve
-    _cache : dict, optional
-        Cache of HDUs
+    _hdus : _HDUIndex, optional
+        Index of the HDUs of ``hdulist``, used instead of searching it.
 
     Returns
     -------
@@ -165,8 +198,11 @@ def get_hdu(hdulist, hdu_name, index=None, _cache=None):
         The HDU as represented by astropy.io.fits
     """
     pair = _get_hdu_pair(hdu_name, index=index)
-    if _cache is not None and pair in _cache:
-        return _cache[pair]
+    if _hdus is not None:
+        hdu = _hdus.find(hdu_name, index)
+        if hdu is None:
+            raise AttributeError(f"Property missing because FITS file has no {pair!r} HDU")
+        return hdu
     try:
         hdu = hdulist[pair]
     except (KeyError, IndexError, AttributeError):
@@ -186,8 +222,6 @@ def get_hdu(hdulist, hdu_name, index=None, _cache=None):
         if hdu.header.get("EXTVER", 1) != index + 1:
             raise AttributeError(f"Property missing because FITS file has no {pair!r} HDU")
 
-    if _cache is not None:
-        _cache[pair] = hdu
     return hdu
 
 
@@ -239,11 +273,289 @@ def _get_or_make_hdu(hdulist, hdu_name, index=None, hdu_type=None, value=None):
     return hdu
 
 
+class _HDUIndex:
+    """
+    Look up the HDUs of an HDUList by name and EXTVER in constant time.
+
+    `astropy.io.fits.HDUList` searches the whole list for each lookup by
+    name, which makes resolving every extension of a product with many
+    of them quadratic. One index is built for the HDUList of a read or
+    write and shared by the schema loader, the mapping of the embedded
+    ASDF arrays and the writer. HDUs added through `get_or_make` keep it
+    up to date. As with HDUList the first matching HDU is returned.
+
+    Parameters
+    ----------
+    hdulist : astropy.io.fits.HDUList or list
+        The HDUs to index.
+    """
+
+    def __init__(self, hdulist):
+        self.hdulist = hdulist
+        self._rebuild()
+
+    @classmethod
+    def for_hdulist(cls, hdulist):
+        """
+        Get an index of an HDUList, reusing the one it already has.
+
+        Parameters
+        ----------
+        hdulist : astropy.io.fits.HDUList or list
+            The HDUs to index.
+
+        Returns
+        -------
+        _HDUIndex
+            The index.
+        """
+        if isinstance(hdulist, _HeaderOnlyHDUList):
+            return hdulist._hdus
+        return cls(hdulist)
+
+    def is_current(self):
+        """
+        Check that the HDUList still holds the indexed HDUs.
+
+        Returns
+        -------
+        bool
+            `True` if the HDUList holds the same HDUs, in the same order,
+            as when it was indexed.
+        """
+        return len(self.hdulist) == len(self._hdus) and all(
+            map(operator.is_, self.hdulist, self._hdus)
+        )
+
+    def _rebuild(self):
+        self._hdus = []
+        self._positions = {}
+        self._by_name = {}
+        self._by_pair = {}
+        self._by_data = None
+        for hdu in self.hdulist:
+            self._add(hdu)
+
+    def _add(self, hdu):
+        self._positions[id(hdu)] = len(self._hdus)
+        self._hdus.append(hdu)
+        name = hdu.name.strip().upper()
+        self._by_name.setdefault(name, hdu)
+        self._by_pair.setdefault((name, hdu.ver), hdu)
+        if len(self._hdus) == 1:
+            self._by_name["PRIMARY"] = hdu
+
+    def get(self, key):
+        """
+        Look up an HDU like ``HDUList.__getitem__``.
+
+        Parameters
+        ----------
+        key : int, str or tuple
+            The position, name or ``(name, ver)`` of the HDU.
+
+        Returns
+        -------
+        hdu : astropy.io.fits.hdu.base._BaseHDU or None
+            The HDU, None if there is no such HDU.
+        """
+        if isinstance(key, (int, np.integer)):
+            try:
+                return self._hdus[key]
+            except IndexError:
+                return None
+        if isinstance(key, tuple):
+            name, ver = key
+        else:
+            name, ver = key, None
+        if not isinstance(name, str):
+            return None
+        name = name.strip().upper()
+        if ver is None:
+            return self._by_name.get(name)
+        if name == "PRIMARY" and self._hdus and self._hdus[0].ver == ver:
+            return self._hdus[0]
+        return self._by_pair.get((name, ver))
+
+    def find(self, hdu_name, index=None):
+        """
+        Look up an HDU like `get_hdu`.
+
+        Parameters
+        ----------
+        hdu_name : str or int
+            The HDU name, 0 for the primary HDU.
+        index : int, optional
+            The item index, the HDU has EXTVER ``index + 1``.
+
+        Returns
+        -------
+        hdu : astropy.io.fits.hdu.base._BaseHDU or None
+            The HDU, None if there is no such HDU.
+        """
+        if isinstance(hdu_name, str):
+            return self.get(_get_hdu_pair(hdu_name, index=index))
+        if index not in (None, 0):
+            return None
+        hdu = self.get(hdu_name)
+        if hdu is not None and index == 0 and hdu.ver != 1:
+            return None
+        return hdu
+
+    def find_data(self, array):
+        """
+        Find the first HDU whose data is ``array``.
+
+        Parameters
+        ----------
+        array : object
+            The array.
+
+        Returns
+        -------
+        hdu : astropy.io.fits.hdu.base._BaseHDU or None
+            The HDU, None if no HDU holds ``array``.
+        """
+        if self._by_data is None:
+            self._by_data = {}
+            for hdu in self._hdus:
+                if hdu.data is not None:
+                    self._by_data.setdefault(id(hdu.data), hdu)
+        return self._by_data.get(id(array))
+
+    def position(self, hdu):
+        """
+        Get the position of an HDU in the HDUList.
+
+        Parameters
+        ----------
+        hdu : astropy.io.fits.hdu.base._BaseHDU
+            An HDU of the HDUList.
+
+        Returns
+        -------
+        int
+            The position of ``hdu``.
+        """
+        return self._positions[id(hdu)]
+
+    def get_or_make(self, hdu_name, index=None, hdu_type=None, value=None):
+        """
+        Find an HDU, making it if needed, like `_get_or_make_hdu`.
+
+        Parameters
+        ----------
+        hdu_name : str or int
+            The HDU name, 0 for the primary HDU.
+        index : int, optional
+            The item index, the HDU has EXTVER ``index + 1``.
+        hdu_type : type, optional
+            The required HDU class.
+        value : object, optional
+            The data to store in the HDU.
+
+        Returns
+        -------
+        hdu : astropy.io.fits.hdu.base._BaseHDU
+            The HDU.
+        """
+        self._by_data = None
+        hdu = self.find(hdu_name, index)
+        if hdu is None:
+            hdu = _make_hdu(self.hdulist, hdu_name, index=index, hdu_type=hdu_type, value=value)
+            self._add(hdu)
+        elif hdu_type is not None and not isinstance(hdu, hdu_type):
+            hdu = _get_or_make_hdu(
+                self.hdulist, hdu_name, index=index, hdu_type=hdu_type, value=value
+            )
+            # the old HDU was removed from the HDUList
+            self._rebuild()
+        elif value is not None:
+            hdu.data = value
+        return hdu
+
+
+class _FitsOpenContext:
+    """
+    What is learned about a FITS file while choosing a model class for it.
+
+    `stdatamodels.jwst.datamodels.open` looks up the extensions and the
+    file name of the file to pick the model class, and passes this to
+    the model constructor (as ``_open_context``) so that the HDU index
+    built for that is reused instead of being built again.
+
+    Parameters
+    ----------
+    hdulist : astropy.io.fits.HDUList
+        The opened file.
+    lazy_arrays : bool, optional
+        If `True` the model asked for its arrays to be read on first
+        access, and the HDUList is kept open until the model is closed.
+    """
+
+    def __init__(self, hdulist, lazy_arrays=False):
+        self.hdulist = hdulist
+        self.lazy_arrays = lazy_arrays
+        self.hdus = _HDUIndex.for_hdulist(hdulist)
+        # HDUList.fileinfo also renders every header to check for resizing
+        self.filename = hdulist.filename()
+
+    def hdus_for(self, hdulist):
+        """
+        Get an index of an HDUList, reusing the one built when opening.
+
+        Parameters
+        ----------
+        hdulist : astropy.io.fits.HDUList
+            The HDUList, possibly migrated by the model class.
+
+        Returns
+        -------
+        _HDUIndex
+            The index.
+        """
+        if hdulist is self.hdulist and self.hdus.is_current():
+            return self.hdus
+        return _HDUIndex.for_hdulist(hdulist)
+
+
 def _assert_non_primary_hdu(hdu_name):
     if hdu_name in (None, 0, "PRIMARY"):
         raise ValueError("Schema for data property does not specify a non-primary hdu name")
 
 
+def _get_compiled_schema(schema, compiler):
+    """
+    Compile a schema, reusing the result for cached schemas.
+
+    Schemas from the schema cache can't change so they are compiled
+    once and the result kept on the schema (in ``_compiled``, keyed by
+    compile function), others are compiled on every call.
+
+    Parameters
+    ----------
+    schema : dict
+        The (merged) schema.
+    compiler : callable
+        Function that takes the schema and returns its compiled form.
+
+    Returns
+    -------
+    object
+        The return value of ``compiler``.
+    """
+    if type(schema) is not mschema._FrozenDict:
+        return compiler(schema)
+    try:
+        return schema._compiled[compiler]
+    except AttributeError:
+        schema._compiled = {}
+    except KeyError:
+        pass
+    compiled = schema._compiled[compiler] = compiler(schema)
+    return compiled
+
+
 ##############################################################################
 # WRITER
 
@@ -390,7 +702,345 @@ def _get_validators(hdulist):
     return validators, fits_context
 
 
-def _save_from_schema(hdulist, tree, schema):
+def _fits_array_check(check, validator, value, instance, schema):
+    if instance is None:
+        return
+
+    instance = np.asanyarray(instance)
+
+    if not len(instance.shape):
+        return
+
+    yield from check(validator, value, instance, schema)
+
+
+def _fits_type_check(validator, items, instance, schema):
+    if instance in ("N/A", "#TODO", "", None):
+        return
+
+    return asdf_schema.YAML_VALIDATORS["type"](validator, items, instance, schema)
+
+
+# Validators used to check a tree before it is written to FITS. These
+# match the checks made by the validator-driven writer but don't write
+# anything, placement is handled by _FitsWriter.
+_SAVE_VALIDATORS = HashableDict(asdf_schema.YAML_VALIDATORS)
+_SAVE_VALIDATORS.update(
+    {
+        "ndim": partial(_fits_array_check, ndarray.validate_ndim),
+        "max_ndim": partial(_fits_array_check, ndarray.validate_max_ndim),
+        "datatype": partial(_fits_array_check, validate._validate_datatype),
+        "type": _fits_type_check,
+    }
+)
+
+
+class _FitsWriterNode:
+    """
+    A schema node with FITS placement information.
+
+    Only nodes that map to a FITS keyword or HDU, or contain nodes
+    that do, are kept so writing a tree only visits those parts of it.
+    """
+
+    __slots__ = (
+        "schema",
+        "hdu_name",
+        "fits_keyword",
+        "comment",
+        "is_array",
+        "title",
+        "properties",
+        "items",
+        "tuple_items",
+        "subnodes",
+    )
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.hdu_name = _get_hdu_name(schema)
+        self.fits_keyword = schema.get("fits_keyword")
+        self.comment = _get_short_doc(schema) if self.fits_keyword is not None else None
+        self.is_array = "ndim" in schema or "max_ndim" in schema or "datatype" in schema
+        self.title = None
+        self.properties = ()
+        self.items = None
+        self.tuple_items = ()
+        self.subnodes = ()
+
+    def is_empty(self):
+        return not (
+            self.fits_keyword is not None
+            or self.is_array
+            or self.properties
+            or self.items is not None
+            or self.tuple_items
+            or self.subnodes
+        )
+
+
+class _CombinerBranchError(Exception):
+    """A FITS keyword or array is in an ``anyOf``, ``oneOf`` or ``not`` branch."""
+
+
+# Returned by _compile_fits_writer_plan for schemas only the legacy writer handles
+_USE_LEGACY_WRITER = object()
+
+
+def _compile_fits_writer_plan(schema):
+    """
+    Compile the FITS placement of a schema into a tree of nodes.
+
+    The legacy writer only writes the branches of an ``anyOf``, ``oneOf``
+    or ``not`` combiner that its validation visits (for ``anyOf``, up to
+    the first branch that validates), which depends on the tree. Schemas
+    that place FITS keywords or arrays in such branches are left to the
+    legacy writer.
+
+    Parameters
+    ----------
+    schema : dict
+        The (merged) schema.
+
+    Returns
+    -------
+    _FitsWriterNode, None or object
+        The root node, `None` if nothing in the schema maps to FITS,
+        or ``_USE_LEGACY_WRITER``.
+    """
+    try:
+        return _compile_fits_writer_node(schema)
+    except _CombinerBranchError:
+        return _USE_LEGACY_WRITER
+
+
+def _compile_fits_writer_node(schema):
+    """
+    Compile the FITS placement of a (sub)schema, see `_compile_fits_writer_plan`.
+
+    Parameters
+    ----------
+    schema : dict
+        The (sub)schema.
+
+    Returns
+    -------
+    _FitsWriterNode or None
+        The node, `None` if nothing in the schema maps to FITS.
+
+    Raises
+    ------
+    _CombinerBranchError
+        If a combiner other than ``allOf`` has a branch that maps to FITS.
+    """
+    if not isinstance(schema, dict):
+        return None
+
+    node = _FitsWriterNode(schema)
+
+    if "properties" in schema:
+        node.title = schema.get("title")
+        children = (
+            (name, _compile_fits_writer_node(sub)) for name, sub in schema["properties"].items()
+        )
+        node.properties = tuple((name, child) for name, child in children if child is not None)
+
+    items = schema.get("items")
+    if isinstance(items, dict):
+        node.items = _compile_fits_writer_node(items)
+    elif isinstance(items, list):
+        node.tuple_items = tuple(_compile_fits_writer_node(sub) for sub in items)
+        if all(child is None for child in node.tuple_items):
+            node.tuple_items = ()
+
+    subnodes = []
+    for combiner in ("allOf", "anyOf", "oneOf", "not"):
+        subschemas = schema.get(combiner, [])
+        if isinstance(subschemas, dict):
+            subschemas = [subschemas]
+        for sub in subschemas:
+            child = _compile_fits_writer_node(sub)
+            if child is None:
+                continue
+            if combiner != "allOf":
+                raise _CombinerBranchError()
+            subnodes.append(child)
+    node.subnodes = tuple(subnodes)
+
+    if node.is_empty():
+        return None
+    return node
+
+
+class _FitsWriter:
+    """
+    Place the keywords and arrays of a tree into an HDUList.
+
+    HDUs are looked up in an `_HDUIndex` of the HDUList, which is updated
+    as HDUs are added, instead of searching the HDUList for every keyword.
+    Keyword cards are collected per HDU and added to its header by
+    `flush`, which must be called once the tree is written. Only the walk
+    of the schema is compiled: the cards are still appended one at a time,
+    as building a whole `astropy.io.fits.Header` at once is not faster and
+    most of the time goes to creating the `astropy.io.fits.Card` objects.
+
+    Parameters
+    ----------
+    hdus : _HDUIndex
+        The index of the HDUList to write to.
+    """
+
+    def __init__(self, hdus):
+        self.hdus = hdus
+        self.comment_stack = []
+        self.extension_array_links = {}
+        # id(hdu) -> (hdu, cards, {keyword: position in cards})
+        self._pending_cards = {}
+
+    def flush(self, hdu=None):
+        """
+        Add the collected keyword cards to the HDU headers.
+
+        Parameters
+        ----------
+        hdu : astropy.io.fits.hdu.base._BaseHDU, optional
+            Only add the cards collected for this HDU.
+        """
+        if hdu is None:
+            pending = self._pending_cards.values()
+            self._pending_cards = {}
+        else:
+            pending = [self._pending_cards.pop(id(hdu), None)]
+        for hdu, cards, _ in filter(None, pending):
+            header = hdu.header
+            for card in cards:
+                header.append(fits.Card(*card), end=True)
+
+    def write(self, node, instance, index=None):
+        """
+        Write an instance to the HDUList following a compiled node.
+
+        Parameters
+        ----------
+        node : _FitsWriterNode
+            The compiled schema node for ``instance``.
+        instance : object
+            The tree node to write.
+        index : int, optional
+            The index of the innermost enclosing array item.
+        """
+        if node.fits_keyword is not None:
+            self.write_keyword(node, instance, index)
+
+        if node.is_array:
+            self.write_array(node, instance, index)
+
+        if node.properties and isinstance(instance, dict):
+            # Titles of sections are written as comments before the
+            # first keyword written within the section.
+            comment_stack = self.comment_stack
+            if node.title is not None:
+                comment_stack.append(node.title)
+            for name, child in node.properties:
+                if name in instance:
+                    self.write(child, instance[name], index)
+            if node.title is not None:
+                comment_stack.pop(-1)
+
+        if isinstance(instance, (list, tuple)):
+            if node.items is not None:
+                for item_index, item in enumerate(instance):
+                    self.write(node.items, item, item_index)
+            else:
+                for child, item in zip(node.tuple_items, instance, strict=False):
+                    if child is not None:
+                        self.write(child, item, index)
+
+        for subnode in node.subnodes:
+            self.write(subnode, instance, index)
+
+    def write_keyword(self, node, instance, index):
+        """
+        Write a keyword value, see `_fits_element_writer`.
+
+        Parameters
+        ----------
+        node : _FitsWriterNode
+            The compiled schema node with a ``fits_keyword``.
+        instance : object
+            The keyword value.
+        index : int or None
+            The index of the innermost enclosing array item.
+        """
+        if node.schema.get("type", "object") == "array":
+            raise ValueError("'fits_keyword' is not valid with type of 'array'")
+
+        hdu = self.hdus.get_or_make(node.hdu_name, index=index)
+        _, cards, positions = self._pending_cards.setdefault(id(hdu), (hdu, [], {}))
+
+        for comment in self.comment_stack:
+            cards.extend(((" ", ""), (" ", comment), (" ", "")))
+        self.comment_stack = []
+
+        fits_keyword = node.fits_keyword
+        if fits_keyword in ("COMMENT", "HISTORY"):
+            # commentary cards are placed relative to the existing cards
+            self.flush(hdu)
+            for item in instance:
+                hdu.header[fits_keyword] = item
+        elif fits_keyword in positions:
+            cards[positions[fits_keyword]] = (fits_keyword, instance, node.comment)
+        elif fits_keyword in hdu.header:
+            hdu.header[fits_keyword] = (instance, node.comment)
+        else:
+            positions[fits_keyword] = len(cards)
+            cards.append((fits_keyword, instance, node.comment))
+
+    def write_array(self, node, instance, index):
+        """
+        Write an array to its HDU, see `_fits_array_writer`.
+
+        Parameters
+        ----------
+        node : _FitsWriterNode
+            The compiled schema node for an array.
+        instance : object
+            The array.
+        index : int or None
+            The index of the innermost enclosing array item.
+        """
+        if instance is None:
+            return
+
+        instance_id = id(instance)
+
+        instance = np.asanyarray(instance)
+
+        if not len(instance.shape):
+            return
+
+        hdu_name = node.hdu_name
+        _assert_non_primary_hdu(hdu_name)
+        if index is None:
+            index = 0
+
+        hdu_type = _get_hdu_type(hdu_name, schema=node.schema, value=instance)
+        # the HDU may be replaced and setting data adds cards, so add
+        # the collected cards first to keep them in order
+        existing = self.hdus.find(hdu_name, index)
+        if existing is not None:
+            self.flush(existing)
+        hdu = self.hdus.get_or_make(hdu_name, index=index, hdu_type=hdu_type)
+
+        hdu.data = instance
+        if instance_id in self.extension_array_links:
+            if self.extension_array_links[instance_id] is not hdu:
+                raise ValueError("Linking one array to multiple hdus is not supported")
+        self.extension_array_links[instance_id] = hdu
+        hdu.ver = index + 1
+
+
+def _save_from_schema(hdulist, tree, schema, legacy_writer=False, hdus=None):
     def datetime_callback(node):
         if isinstance(node, datetime.datetime):
             node = time.Time(node)
@@ -404,27 +1054,57 @@ def _save_from_schema(hdulist, tree, schema):
 
     kwargs = {"_visit_repeat_nodes": True}
 
-    validators, context = _get_validators(hdulist)
-    validator = asdf_schema.get_validator(schema, None, validators, **kwargs)
+    if hdus is None:
+        hdus = _HDUIndex(hdulist)
 
-    # This actually kicks off the saving
-    validator.validate(tree, _schema=schema)
+    plan = None
+    if not legacy_writer and schema is not None:
+        plan = _get_compiled_schema(schema, _compile_fits_writer_plan)
+        legacy_writer = plan is _USE_LEGACY_WRITER
+
+    if legacy_writer:
+        validators, context = _get_validators(hdulist)
+        validator = asdf_schema.get_validator(schema, None, validators, **kwargs)
+
+        # This actually kicks off the saving
+        validator.validate(tree, _schema=schema)
+
+        links = {key: ref() for key, ref in context.extension_array_links.items()}
+        # the validators added HDUs without the index
+        hdus._rebuild()
+    else:
+        links = {}
+        if schema is not None:
+            # Validate first so nothing is written for an invalid tree
+            validator = asdf_schema.get_validator(schema, None, _SAVE_VALIDATORS, **kwargs)
+            validator.validate(tree, _schema=schema)
+
+            if plan is not None:
+                writer = _FitsWriter(hdus)
+                writer.write(plan, tree)
+                writer.flush()
+                links = writer.extension_array_links
+
+    # extra_fits HDUs are added before linking so that every reference
+    # to their arrays, not only the one under extra_fits, is linked
+    for key, hdu in _save_extra_fits(hdulist, tree, hdus=hdus).items():
+        links.setdefault(key, hdu)
 
     # Now link extensions to items in the tree
 
     def callback(node):
-        if id(node) in context.extension_array_links:
-            hdu = context.extension_array_links[id(node)]()
-            return _create_tagged_dict_for_fits_array(hdu, hdulist.index(hdu))
+        if id(node) in links:
+            hdu = links[id(node)]
+            return _create_tagged_dict_for_fits_array(hdu, hdus.position(hdu))
         elif isinstance(node, (np.ndarray, NDArrayType)):
             # in addition to links generated during validation
             # replace arrays in the tree that are identical to HDU arrays
             # with ndarray-1.0.0 tagged objects with special source values
             # that represent links to the surrounding FITS file.
             # This is important for general ASDF-in-FITS support
-            for hdu_index, hdu in enumerate(hdulist):
-                if hdu.data is not None and node is hdu.data:
-                    return _create_tagged_dict_for_fits_array(hdu, hdu_index)
+            hdu = hdus.find_data(node)
+            if hdu is not None:
+                return _create_tagged_dict_for_fits_array(hdu, hdus.position(hdu))
         return node
 
     tree = treeutil.walk_and_modify(tree, callback)
@@ -488,22 +1168,25 @@ def _normalize_arrays(tree):
     return treeutil.walk_and_modify(tree, normalize_array)
 
 
-def _save_extra_fits(hdulist, tree):
-    # Handle _extra_fits
+def _save_extra_fits(hdulist, tree, hdus=None):
+    if hdus is None:
+        hdus = _HDUIndex(hdulist)
+
+    # Handle _extra_fits, returning the HDU for each data array (by id)
+    links = {}
     for hdu_name, parts in tree.get("extra_fits", {}).items():
         if "data" in parts:
             hdu_type = _get_hdu_type(hdu_name, value=parts["data"])
-            hdu = _get_or_make_hdu(hdulist, hdu_name, hdu_type=hdu_type, value=parts["data"])
-            node = _create_tagged_dict_for_fits_array(hdu, hdulist.index(hdu))
-            tree["extra_fits"][hdu_name]["data"] = node
+            hdu = hdus.get_or_make(hdu_name, hdu_type=hdu_type, value=parts["data"])
+            links[id(parts["data"])] = hdu
         if "header" in parts:
-            hdu = _get_or_make_hdu(hdulist, hdu_name)
+            hdu = hdus.get_or_make(hdu_name)
             for key, val, comment in parts["header"]:
                 if is_builtin_fits_keyword(key):
                     continue
                 hdu.header.append((key, val, comment), end=True)
 
-    return tree
+    return links
 
 
 def _save_history(hdulist, tree):
@@ -526,7 +1209,7 @@ def _save_history(hdulist, tree):
         hdulist[0].header["HISTORY"] = history[i]["description"]
 
 
-def to_fits(tree, schema, hdulist=None):
+def to_fits(tree, schema, hdulist=None, legacy_writer=None):
     """
     Create hdulist and modified ASDF tree.
 
@@ -538,6 +1221,11 @@ def to_fits(tree, schema, hdulist=None):
         The schema for the ASDF tree.
     hdulist : astropy.io.fits.HDUList, optional
         The HDU list to append to. If not provided, a new HDU list will be created.
+    legacy_writer : bool, optional
+        If True, place keywords and arrays by running the schema validator
+        with writing validators, as done before the compiled writer was added.
+        This is slower and only kept for comparison. If None, the value of
+        the ``LEGACY_FITS_WRITER`` environment variable is used (default False).
 
     Returns
     -------
@@ -548,16 +1236,22 @@ def to_fits(tree, schema, hdulist=None):
         hdulist = fits.HDUList()
         hdulist.append(fits.PrimaryHDU())
 
+    if legacy_writer is None:
+        legacy_writer = util.get_envar_as_boolean("LEGACY_FITS_WRITER", False)
+
+    util.materialize_lazy(tree)
     tree = _normalize_arrays(tree)
-    tree = _save_from_schema(hdulist, tree, schema)
-    tree = _save_extra_fits(hdulist, tree)
+    hdus = _HDUIndex(hdulist)
+    tree = _save_from_schema(hdulist, tree, schema, legacy_writer=legacy_writer, hdus=hdus)
     _save_history(hdulist, tree)
 
     # Store the FITS hash in the tree
-    tree[FITS_HASH_KEY] = fits_hash(hdulist)
+    tree[FITS_HASH_KEY] = fits_hash(hdulist, algorithm=FITS_HASH_ALGORITHM)
+    tree[FITS_HASH_ALGORITHM_KEY] = FITS_HASH_ALGORITHM
 
-    if _ASDF_EXTENSION_NAME in hdulist:
-        del hdulist[_ASDF_EXTENSION_NAME]
+    asdf_hdu = hdus.get(_ASDF_EXTENSION_NAME)
+    if asdf_hdu is not None:
+        del hdulist[hdus.position(asdf_hdu)]
 
     hdulist.append(_create_asdf_hdu(tree))
 
@@ -574,20 +1268,206 @@ def _create_asdf_hdu(tree):
     asdf.AsdfFile(util.convert_fitsrec_to_array_in_tree(tree)).write_to(buffer)
     buffer.seek(0)
 
-    data = np.array(buffer.getbuffer(), dtype=np.uint8)[None, :]
+    # The table gets its own copy of the data so use a view of the buffer
+    data = np.frombuffer(buffer.getbuffer(), dtype=np.uint8)[None, :]
     fmt = f"{len(data[0])}B"
     column = fits.Column(array=data, format=fmt, name="ASDF_METADATA")
     return fits.BinTableHDU.from_columns([column], name=_ASDF_EXTENSION_NAME)
 
 
+def stream_placeholder(shape, dtype):
+    """
+    Create an array to stand in for a streamed array while building headers.
+
+    The array is memory mapped from an empty temporary file, so it
+    has the shape, datatype and memory layout of the real array without
+    using memory or disk space as long as its values are not read.
+
+    Parameters
+    ----------
+    shape : tuple of int
+        The shape of the array.
+    dtype : numpy.dtype
+        The datatype of the array.
+
+    Returns
+    -------
+    numpy.memmap
+        The placeholder array.
+    """
+    dtype = np.dtype(dtype)
+    with tempfile.TemporaryFile() as fd:
+        fd.truncate(max(int(np.prod(shape)) * dtype.itemsize, 1))
+        return np.memmap(fd, dtype=dtype, mode="r+", shape=tuple(shape))
+
+
+def _hdu_to_bytes(hdu, is_primary=False):
+    """
+    Serialize a single HDU, header and data, the way it is written to a file.
+
+    Parameters
+    ----------
+    hdu : astropy.io.fits.hdu.base._BaseHDU
+        The HDU to serialize.
+    is_primary : bool, optional
+        True if ``hdu`` is the primary HDU of the file.
+
+    Returns
+    -------
+    bytes
+        The bytes of the HDU.
+    """
+    buffer = io.BytesIO()
+    if is_primary:
+        fits.HDUList([hdu]).writeto(buffer)
+        return buffer.getvalue()
+    # Extensions can only be written after a primary HDU, whose
+    # empty header takes exactly one block.
+    fits.HDUList([fits.PrimaryHDU(), hdu]).writeto(buffer)
+    return buffer.getvalue()[_FITS_BLOCK_SIZE:]
+
+
+class FitsStreamWriter:
+    """
+    Write a FITS file whose largest arrays are filled in chunks.
+
+    All headers and the arrays that are not streamed are written when
+    the writer is created, leaving zero-filled room for the data units
+    of the streamed arrays. Chunks written with `write` go directly to
+    those data units on disk, so only one chunk of a streamed array needs
+    to be in memory at a time. The ASDF extension, which holds the FITS
+    hash, is appended when the writer is closed.
+
+    Use `stdatamodels.DataModel.to_fits_stream` to create one.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+        The file to write to.
+    hdulist : astropy.io.fits.HDUList
+        The HDU list from `to_fits`, with `stream_placeholder` arrays
+        as the data of the streamed HDUs.
+    placeholders : dict
+        Mapping of the names of the streamed arrays to their placeholders.
+    overwrite : bool, optional
+        If True, overwrite ``path`` if it exists.
+    """
+
+    def __init__(self, path, hdulist, placeholders, overwrite=False):
+        self._path = path
+        self._fd = open(path, "w+b" if overwrite else "x+b")  # noqa: SIM115
+        self._arrays = {}
+
+        self._asdf_hdu = None
+        if _ASDF_EXTENSION_NAME in hdulist:
+            self._asdf_hdu = hdulist[_ASDF_EXTENSION_NAME]
+            del hdulist[_ASDF_EXTENSION_NAME]
+
+        try:
+            self._write_layout(hdulist, placeholders)
+        except Exception:
+            self._abort()
+            raise
+
+    def _write_layout(self, hdulist, placeholders):
+        names = {id(array): name for name, array in placeholders.items()}
+        data_units = []
+        for index, hdu in enumerate(hdulist):
+            name = names.get(id(hdu.data))
+            if name is None:
+                self._fd.write(_hdu_to_bytes(hdu, is_primary=index == 0))
+                continue
+            self._fd.write(hdu.header.tostring().encode("ascii"))
+            offset = self._fd.tell()
+            nbytes = hdu.data.nbytes
+            # The data unit is left as a hole of zeros, padded to a
+            # whole number of FITS blocks.
+            self._fd.seek(offset + -(-nbytes // _FITS_BLOCK_SIZE) * _FITS_BLOCK_SIZE)
+            data_units.append((name, offset, hdu.data, hdu.header))
+        self._fd.truncate(self._fd.tell())
+        self._fd.flush()
+
+        for name, offset, placeholder, header in data_units:
+            dtype = placeholder.dtype
+            # Unsigned integers (and int8) are stored as signed values
+            # shifted by BZERO, which is a flip of the sign bit.
+            flip = dtype.kind in "iu" and "BZERO" in header
+            if flip:
+                stored_dtype = np.dtype(f">u{dtype.itemsize}")
+            else:
+                stored_dtype = dtype.newbyteorder(">")
+            self._arrays[name] = (offset, placeholder.shape, stored_dtype, dtype, flip)
+
+    def write(self, name, key, value):
+        """
+        Write a chunk of a streamed array.
+
+        Parameters
+        ----------
+        name : str
+            The name of the streamed array.
+        key : int, slice or tuple
+            The numpy index of the chunk in the full array, for example
+            the integration number.
+        value : array-like
+            The values of the chunk. They are converted to the datatype
+            of the array.
+        """
+        if self._fd.closed:
+            raise ValueError("I/O operation on closed stream writer")
+        try:
+            offset, shape, stored_dtype, dtype, flip = self._arrays[name]
+        except KeyError:
+            raise KeyError(f"{name!r} is not a streamed array") from None
+        value = np.asarray(value).astype(dtype, copy=False)
+        if flip:
+            unsigned = np.dtype(f"u{dtype.itemsize}")
+            value = value.view(unsigned) ^ unsigned.type(1 << (8 * dtype.itemsize - 1))
+        if not np.prod(shape):
+            return
+        # Map the data unit for each chunk so written pages are left to
+        # the page cache instead of accumulating in this process.
+        array = np.memmap(self._fd, dtype=stored_dtype, mode="r+", offset=offset, shape=shape)
+        array[key] = value
+
+    def close(self):
+        """Flush the streamed arrays and write the ASDF extension."""
+        if self._fd.closed:
+            return
+        try:
+            self._arrays.clear()
+            if self._asdf_hdu is not None:
+                self._fd.seek(0, os.SEEK_END)
+                self._fd.write(_hdu_to_bytes(self._asdf_hdu))
+        finally:
+            self._fd.close()
+
+    def _abort(self):
+        if self._fd.closed:
+            return
+        self._arrays.clear()
+        self._fd.close()
+        Path(self._path).unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # Don't leave behind a file that looks complete.
+            self._abort()
+
+
 ##############################################################################
 # READER
 
 
-def _fits_keyword_loader(hdulist, fits_keyword, schema, hdu_index, known_keywords, fits_hdu_cache):
+def _fits_keyword_loader(hdulist, fits_keyword, schema, hdu_index, known_keywords, hdus):
     hdu_name = _get_hdu_name(schema)
     try:
-        hdu = get_hdu(hdulist, hdu_name, hdu_index, _cache=fits_hdu_cache)
+        hdu = get_hdu(hdulist, hdu_name, hdu_index, _hdus=hdus)
     except AttributeError:
         return None
 
@@ -605,18 +1485,57 @@ def _fits_keyword_loader(hdulist, fits_keyword, schema, hdu_index, known_keyword
     return val
 
 
-def _fits_array_loader(hdulist, schema, hdu_index, known_datas, fits_hdu_cache):
+def _fits_array_loader(hdulist, schema, hdu_index, known_datas, hdus, lazy=False):
     hdu_name = _get_hdu_name(schema)
     _assert_non_primary_hdu(hdu_name)
     try:
-        hdu = get_hdu(hdulist, hdu_name, hdu_index, _cache=fits_hdu_cache)
+        hdu = get_hdu(hdulist, hdu_name, hdu_index, _hdus=hdus)
     except AttributeError:
         return None
 
     known_datas.add(hdu)
+    if lazy:
+        return util._LazyArray(from_fits_hdu, hdu, schema, section_loader=_read_hdu_section)
     return from_fits_hdu(hdu, schema)
 
 
+def _hdu_data(hdu):
+    return hdu.data
+
+
+def _read_hdu_section(key, hdu, schema=None):
+    """
+    Read part of the data of a FITS HDU.
+
+    Image HDUs are read through `~astropy.io.fits.ImageHDU.section` so
+    only the requested part of the data is read from the file.
+
+    Parameters
+    ----------
+    key : int, slice or tuple
+        The numpy index of the part to read.
+    hdu : astropy.io.fits.hdu.base._BaseHDU
+        The FITS HDU.
+    schema : dict, optional
+        The schema for the data. If given, the data is converted
+        to the schema datatype.
+
+    Returns
+    -------
+    numpy.ndarray
+        The requested part of the data.
+    """
+    if not hasattr(hdu, "section"):
+        data = hdu.data if schema is None else from_fits_hdu(hdu, schema)
+        return data[key]
+
+    data = hdu.section[key]
+    if schema is not None and isinstance(schema.get("datatype"), str):
+        dtype = ndarray.asdf_datatype_to_numpy_dtype(schema["datatype"])
+        data = util.gentle_asarray(data, dtype)
+    return data
+
+
 def _schema_has_fits_hdu(schema):
     has_fits_hdu = [False]
 
@@ -627,8 +1546,264 @@ def _schema_has_fits_hdu(schema):
     return has_fits_hdu[0]
 
 
+class _FitsSchemaEntry(
+    namedtuple(
+        "_FitsSchemaEntry",
+        ["path", "item_positions", "hdu_name", "fits_keyword", "tag", "is_array", "schema"],
+    )
+):
+    """
+    One schema node mapped to a FITS keyword or HDU.
+
+    ``path`` is the tree path with `None` in place of the index of each
+    enclosing array whose items map to indexed (EXTVER) HDUs, and
+    ``item_positions`` lists where those placeholders are.
+    """
+
+    __slots__ = ()
+
+    def item_paths(self, max_extver):
+        """
+        Yield the (path, hdu_index) pairs this entry maps to.
+
+        Parameters
+        ----------
+        max_extver : int
+            The maximum EXTVER in the HDUList, which bounds the item indices.
+
+        Yields
+        ------
+        path : list
+            The tree path with array placeholders filled in.
+        hdu_index : int or None
+            The index of the innermost array item or `None` for
+            entries that are not inside an array.
+        """
+        if not self.item_positions:
+            yield list(self.path), None
+            return
+        path = list(self.path)
+        for indices in itertools.product(range(max_extver), repeat=len(self.item_positions)):
+            for position, index in zip(self.item_positions, indices, strict=True):
+                path[position] = index
+            yield list(path), indices[-1]
+
+
+def _compile_fits_schema_index(schema):
+    """
+    Flatten the FITS mapping of a schema into a tuple of entries.
+
+    This performs the schema walk that loading a FITS file needs once
+    so each load is a linear pass over the entries.
+
+    Parameters
+    ----------
+    schema : dict
+        The (merged) schema.
+
+    Returns
+    -------
+    tuple of _FitsSchemaEntry
+        The entries in schema walk order.
+    """
+    entries = []
+
+    def callback(subschema, path, combiner, ctx, recurse):
+        is_array = "fits_hdu" in subschema and (
+            "max_ndim" in subschema or "ndim" in subschema or "datatype" in subschema
+        )
+        if "fits_keyword" in subschema or is_array:
+            entries.append(
+                _FitsSchemaEntry(
+                    tuple(path),
+                    tuple(i for i, part in enumerate(path) if part is None),
+                    _get_hdu_name(subschema),
+                    subschema.get("fits_keyword"),
+                    subschema.get("tag"),
+                    is_array,
+                    subschema,
+                )
+            )
+
+        if subschema.get("type") == "array" and _schema_has_fits_hdu(subschema):
+            recurse(subschema["items"], path + [None], combiner, ctx)
+            return True
+
+    mschema.walk_schema(schema, callback)
+    return tuple(entries)
+
+
+def _get_fits_schema_index(schema):
+    """
+    Get the compiled FITS mapping for a schema.
+
+    Parameters
+    ----------
+    schema : dict
+        The (merged) schema.
+
+    Returns
+    -------
+    tuple of _FitsSchemaEntry
+        The entries in schema walk order.
+    """
+    return _get_compiled_schema(schema, _compile_fits_schema_index)
+
+
+class _FieldMatcher:
+    """
+    Select tree paths by dot-separated names or glob patterns.
+
+    Each field is split into names at the dots and each name may be a glob
+    pattern (as in `fnmatch`), for example ``"meta.exposure.*"`` or
+    ``"slits.*.name"``. Array items are selected by their index, as in
+    ``"slits.0.name"``. A path is selected if it or one of its parents
+    matches a field.
+
+    Parameters
+    ----------
+    fields : list of str
+        The fields to select.
+    """
+
+    def __init__(self, fields):
+        self.patterns = []
+        for field in fields:
+            self.patterns.append(
+                tuple(
+                    re.compile(fnmatch.translate(name)) if _is_glob(name) else name
+                    for name in field.split(".")
+                )
+            )
+
+    def __call__(self, path):
+        """
+        Check if a path is selected.
+
+        Parameters
+        ----------
+        path : list
+            The keys and indices of the path.
+
+        Returns
+        -------
+        bool
+            True if the path is selected.
+        """
+        names = [str(part) for part in path]
+        for pattern in self.patterns:
+            if len(names) >= len(pattern) and all(
+                name == part if isinstance(part, str) else part.match(name)
+                for name, part in zip(names, pattern, strict=False)
+            ):
+                return True
+        return False
+
+    def may_match(self, path):
+        """
+        Check if a path with unknown array indices may be selected.
+
+        Parameters
+        ----------
+        path : tuple
+            The keys of the path, with `None` for array indices.
+
+        Returns
+        -------
+        bool
+            False if the path can't be selected for any array indices.
+        """
+        for pattern in self.patterns:
+            if len(path) < len(pattern):
+                continue
+            for name, part in zip(path, pattern, strict=False):
+                if name is None:
+                    if isinstance(part, str) and not part.isdigit():
+                        break
+                elif name != part if isinstance(part, str) else not part.match(name):
+                    break
+            else:
+                return True
+        return False
+
+
+def _is_glob(name):
+    return any(char in name for char in "*?[")
+
+
+def _array_selector(arrays, exclude_arrays):
+    """
+    Build a function that checks if the array at a tree path should be loaded.
+
+    Parameters
+    ----------
+    arrays : list of str or None
+        The arrays to load, as dot-separated names or glob patterns
+        (see `_FieldMatcher`). If `None`, all arrays are loaded.
+    exclude_arrays : list of str or None
+        The arrays to skip, as dot-separated names or glob patterns.
+
+    Returns
+    -------
+    callable or None
+        Function called with a tree path that returns True if the array
+        should be loaded, or `None` if all arrays should be loaded.
+    """
+    if arrays is None and not exclude_arrays:
+        return None
+    include = None if arrays is None else _FieldMatcher(arrays)
+    exclude = _FieldMatcher(exclude_arrays or ())
+
+    def is_selected(path):
+        return (include is None or include(path)) and not exclude(path)
+
+    return is_selected
+
+
+def _drop_arrays(tree, path, is_selected):
+    """
+    Remove the arrays at a schema path that are not selected from a tree.
+
+    Parameters
+    ----------
+    tree : dict
+        The tree to update.
+    path : tuple
+        The schema path of the array, with `None` for array indices.
+    is_selected : callable
+        Called with the tree path of each array, returns False for the
+        arrays to remove.
+    """
+    nodes = [([], tree)]
+    for part in path[:-1]:
+        children = []
+        for node_path, node in nodes:
+            if part is None:
+                if isinstance(node, list):
+                    children.extend((node_path + [index], item) for index, item in enumerate(node))
+            elif isinstance(node, dict) and part in node:
+                children.append((node_path + [part], node[part]))
+        nodes = children
+
+    name = path[-1]
+    for node_path, node in nodes:
+        if isinstance(node, dict) and name in node and not is_selected(node_path + [name]):
+            del node[name]
+
+
 def _load_from_schema(
-    hdulist, schema, tree, context, skip_fits_update=False, ignore_arrays=False, keep_unknown=True
+    hdulist,
+    schema,
+    tree,
+    context,
+    skip_fits_update=False,
+    ignore_arrays=False,
+    keep_unknown=True,
+    fields=None,
+    lazy_arrays=False,
+    arrays=None,
+    exclude_arrays=None,
+    hdus=None,
 ):
     """
     Read model information from a FITS HDU list.
@@ -651,6 +1826,21 @@ def _load_from_schema(
         Controls the behavior for keywords that are in the schema but NOT in the input hdulist.
         If True, the output tree contains the keyword, and the corresponding attribute is None.
         If False, the keyword is not present in the output tree.
+    fields : list of str, optional
+        If given, only load the keywords and arrays at these dot-separated
+        names or glob patterns, see `_FieldMatcher`.
+    lazy_arrays : bool, optional
+        If True, arrays are stored as placeholders that are read, cast
+        and validated on first attribute access. The HDUList must stay
+        open for as long as the placeholders are in the tree.
+    arrays : list of str, optional
+        If given, only load the arrays at these dot-separated names or
+        glob patterns. Other arrays are left out of the tree.
+    exclude_arrays : list of str, optional
+        Do not load the arrays at these dot-separated names or glob
+        patterns, and leave them out of the tree.
+    hdus : _HDUIndex, optional
+        Index of the HDUs of ``hdulist``, built if not given.
 
     Returns
     -------
@@ -662,6 +1852,15 @@ def _load_from_schema(
     known_keywords = {}
     known_datas = set()
 
+    index = _get_fits_schema_index(schema)
+
+    is_selected_array = _array_selector(arrays, exclude_arrays)
+    if is_selected_array is not None:
+        # The embedded ASDF tree may already reference the skipped arrays
+        for entry in index:
+            if entry.is_array:
+                _drop_arrays(tree, entry.path, is_selected_array)
+
     # Check if there are any table HDU's. If not, this whole process
     # can be skipped.
     if skip_fits_update:
@@ -675,66 +1874,82 @@ def _load_from_schema(
 
     # Determine maximum EXTVER that could be used in finding named HDU's.
     # This is needed to constrain the loop over HDU's when resolving arrays.
-    max_extver = max(hdu.ver for hdu in hdulist) if len(hdulist) else 0
+    if len(hdulist) and any(entry.item_positions for entry in index):
+        max_extver = max(hdu.ver for hdu in hdulist)
+    else:
+        max_extver = 0
 
     # hdulist.__getitem__ is surprisingly slow (2 ms per call on my system
-    # for a nirspec mos file with ~500 extensions) so we use a cache
-    # here to handle repeated accesses. A lru_cache around get_hdu
-    # was not used as hdulist is not hashable.
-    hdu_cache = {}
-
-    def callback(schema, path, combiner, ctx, recurse):
-        result = None
-        if not skip_fits_update and "fits_keyword" in schema:
-            fits_keyword = schema["fits_keyword"]
-            result = _fits_keyword_loader(
-                hdulist, fits_keyword, schema, ctx.get("hdu_index"), known_keywords, hdu_cache
-            )
-            if result is None and not keep_unknown:
-                return
-            if result is None and context._validate_on_assignment:
-                validate.value_change(path, result, schema, context)
+    # for a nirspec mos file with ~500 extensions) as it searches the
+    # whole list, so HDUs are looked up in an index instead.
+    if hdus is None:
+        hdus = _HDUIndex.for_hdulist(hdulist)
+
+    matches = None if fields is None else _FieldMatcher(fields)
+
+    for entry in index:
+        if entry.fits_keyword is not None and not skip_fits_update:
+            is_keyword = True
+        elif entry.is_array and not ignore_arrays:
+            is_keyword = False
+        else:
+            continue
+
+        if matches is not None and not matches.may_match(entry.path):
+            continue
+
+        for path, hdu_index in entry.item_paths(max_extver):
+            if matches is not None and not matches(path):
+                continue
+            if is_keyword:
+                result = _fits_keyword_loader(
+                    hdulist, entry.fits_keyword, entry.schema, hdu_index, known_keywords, hdus
+                )
+                if result is None and not keep_unknown:
+                    continue
+            elif is_selected_array is not None and not is_selected_array(path):
+                # Only look up the HDU, to keep it out of extra_fits
+                _fits_array_loader(hdulist, entry.schema, hdu_index, known_datas, hdus, lazy=True)
+                continue
             else:
-                if context._validate_on_assignment:
-                    if validate.value_change(path, result, schema, context):
-                        properties.put_value(path, result, tree)
-                else:
+                result = _fits_array_loader(
+                    hdulist, entry.schema, hdu_index, known_datas, hdus, lazy=lazy_arrays
+                )
+                if isinstance(result, util._LazyArray):
+                    # validation happens when the array is first accessed
                     properties.put_value(path, result, tree)
-
-        elif (
-            "fits_hdu" in schema
-            and ("max_ndim" in schema or "ndim" in schema or "datatype" in schema)
-            and not ignore_arrays
-        ):
-            result = _fits_array_loader(
-                hdulist, schema, ctx.get("hdu_index"), known_datas, hdu_cache
-            )
+                    continue
 
             if result is None and context._validate_on_assignment:
-                validate.value_change(path, result, schema, context)
+                validate.value_change(path, result, entry.schema, context)
             else:
                 if context._validate_on_assignment:
-                    if validate.value_change(path, result, schema, context):
+                    if validate.value_change(path, result, entry.schema, context):
                         properties.put_value(path, result, tree)
                 else:
                     properties.put_value(path, result, tree)
 
-        if schema.get("type") == "array":
-            has_fits_hdu = _schema_has_fits_hdu(schema)
-            if has_fits_hdu:
-                for i in range(max_extver):
-                    recurse(schema["items"], path + [i], combiner, {"hdu_index": i})
-                return True
-
-    mschema.walk_schema(schema, callback)
     return known_keywords, known_datas
 
 
-def _load_extra_fits(hdulist, known_keywords, known_datas, tree):
+def _load_extra_fits(hdulist, known_keywords, known_datas, tree, lazy=False):
     # Remove any extra_fits from tree
     if "extra_fits" in tree:
         del tree["extra_fits"]
 
+    if lazy:
+        # Collected on first access, and removed if there is nothing to collect
+        tree["extra_fits"] = util._Lazy(_make_extra_fits, hdulist, known_keywords, known_datas)
+        return
+
+    extra_fits = _make_extra_fits(hdulist, known_keywords, known_datas)
+    if extra_fits is not None:
+        tree["extra_fits"] = extra_fits
+
+
+def _make_extra_fits(hdulist, known_keywords, known_datas):
+    extra_fits = {}
+
     # Add header keywords and data not in schema to extra_fits
     for hdu in hdulist:
         # Don't add ASDF hdus to extra_fits for any reason
@@ -742,16 +1957,20 @@ def _load_extra_fits(hdulist, known_keywords, known_datas, tree):
             known = known_keywords.get(hdu, set())
 
             cards = []
-            for key, val, comment in hdu.header.cards:
-                if not (is_builtin_fits_keyword(key) or key in known):
-                    cards.append([key, val, comment])
+            for card in hdu.header.cards:
+                # only parse the value and comment of unknown cards
+                key = card.keyword
+                if not (key in known or is_builtin_fits_keyword(key)):
+                    cards.append([key, card.value, card.comment])
 
             if len(cards):
-                properties.put_value(["extra_fits", hdu.name, "header"], cards, tree)
+                properties.put_value([hdu.name, "header"], cards, extra_fits)
 
             if hdu not in known_datas:
                 if hdu.data is not None:
-                    properties.put_value(["extra_fits", hdu.name, "data"], hdu.data, tree)
+                    properties.put_value([hdu.name, "data"], hdu.data, extra_fits)
+
+    return extra_fits or None
 
 
 def _load_history(hdulist, tree):
@@ -770,8 +1989,190 @@ def _load_history(hdulist, tree):
         history["entries"].append(HistoryEntry({"description": entry}))
 
 
+_FITS_BLOCK_SIZE = 2880
+_FITS_CARD_SIZE = 80
+_FITS_END_CARD = b"END" + b" " * (_FITS_CARD_SIZE - 3)
+
+
+class _HeaderOnlyHDU:
+    """
+    An HDU read from a FITS file without its data unit.
+
+    Provides the ``header``, ``name`` and ``ver`` attributes of an
+    astropy HDU. ``raw_data`` holds the bytes of the main data table
+    for extensions whose data was requested and is `None` otherwise.
+    """
+
+    def __init__(self, header, is_primary, raw_data=None):
+        self.header = header
+        self._default_name = "PRIMARY" if is_primary else ""
+        self.raw_data = raw_data
+
+    @property
+    def name(self):
+        return str(self.header.get("EXTNAME", self._default_name))
+
+    @property
+    def ver(self):
+        return self.header.get("EXTVER", 1)
+
+
+class _HeaderOnlyHDUList(list):
+    """
+    A list of `_HeaderOnlyHDU` supporting the lookups of an HDUList.
+
+    HDUs can be looked up by index, name or ``(name, ver)``. As with
+    `astropy.io.fits.HDUList` the first matching HDU is returned.
+    """
+
+    def __init__(self, hdus):
+        super().__init__(hdus)
+        self._hdus = _HDUIndex(self)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer, slice)):
+            return super().__getitem__(key)
+        name = key[0] if isinstance(key, tuple) else key
+        if not isinstance(name, str):
+            raise KeyError(
+                f"{type(self).__name__} indices must be integers, extension "
+                f"names as strings, or (extname, version) tuples; got {name}"
+            )
+        hdu = self._hdus.get(key)
+        if hdu is None:
+            raise KeyError(f"Extension {key!r} not found.")
+        return hdu
+
+
+def _fits_data_size(header, is_primary):
+    """
+    Compute the size of the data unit following a header, including padding.
+
+    Parameters
+    ----------
+    header : astropy.io.fits.Header
+        The HDU header.
+    is_primary : bool
+        True for the primary header, which may describe random groups.
+
+    Returns
+    -------
+    int
+        The size in bytes, a multiple of the FITS block size.
+    """
+    naxis = header.get("NAXIS", 0)
+    if not naxis:
+        return 0
+    shape = [header.get(f"NAXIS{i}", 0) for i in range(1, naxis + 1)]
+    if is_primary and header.get("GROUPS") and shape[0] == 0:
+        shape = shape[1:]
+    size = (
+        abs(header["BITPIX"])
+        // 8
+        * header.get("GCOUNT", 1)
+        * (header.get("PCOUNT", 0) + int(np.prod(shape)))
+    )
+    return -(-size // _FITS_BLOCK_SIZE) * _FITS_BLOCK_SIZE
+
+
+def _scan_fits_headers(fileobj, data_extnames=()):
+    """
+    Read the headers of a FITS file, seeking over the data units.
+
+    Parameters
+    ----------
+    fileobj : file-like
+        A seekable binary file positioned at the start of the FITS file.
+    data_extnames : tuple of str, optional
+        Names of extensions for which the bytes of the main data table are
+        read into ``raw_data``. The data of all other HDUs are never read.
+
+    Returns
+    -------
+    _HeaderOnlyHDUList
+        The HDUs.
+
+    Raises
+    ------
+    OSError
+        If the file does not start with a FITS primary header.
+    """
+    hdus = []
+    while True:
+        blocks = []
+        while True:
+            block = fileobj.read(_FITS_BLOCK_SIZE)
+            if len(block) < _FITS_BLOCK_SIZE:
+                # end of file, or trailing bytes that can't hold a header
+                block = None
+                break
+            blocks.append(block)
+            cards = (
+                block[i : i + _FITS_CARD_SIZE] for i in range(0, _FITS_BLOCK_SIZE, _FITS_CARD_SIZE)
+            )
+            if _FITS_END_CARD in cards:
+                break
+        if block is None:
+            break
+
+        header_bytes = b"".join(blocks)
+        is_primary = not hdus
+        if is_primary and not header_bytes.startswith(b"SIMPLE  ="):
+            raise OSError("File does not start with a FITS primary header")
+        header = fits.Header.fromstring(header_bytes.decode("ascii"))
+
+        data_size = _fits_data_size(header, is_primary)
+        hdu = _HeaderOnlyHDU(header, is_primary)
+        if not is_primary and hdu.name.strip().upper() in data_extnames:
+            table_size = header.get("NAXIS1", 0) * header.get("NAXIS2", 0)
+            hdu.raw_data = fileobj.read(table_size)
+            data_size -= len(hdu.raw_data)
+        fileobj.seek(data_size, io.SEEK_CUR)
+        hdus.append(hdu)
+
+    if not hdus:
+        raise OSError("File does not start with a FITS primary header")
+    return _HeaderOnlyHDUList(hdus)
+
+
+def _read_fits_headers(fname, data_extnames=()):
+    """
+    Read the headers of a (possibly gzipped) FITS file without its data.
+
+    Parameters
+    ----------
+    fname : str or Path
+        The FITS file path.
+    data_extnames : tuple of str, optional
+        Names of extensions for which the bytes of the main data table are
+        read, see `_scan_fits_headers`.
+
+    Returns
+    -------
+    _HeaderOnlyHDUList
+        The HDUs.
+    """
+    with open(fname, "rb") as fileobj:
+        is_gzip = fileobj.read(2) == b"\x1f\x8b"
+        fileobj.seek(0)
+        if is_gzip:
+            with gzip.open(fileobj) as gzip_fileobj:
+                return _scan_fits_headers(gzip_fileobj, data_extnames)
+        return _scan_fits_headers(fileobj, data_extnames)
+
+
 def from_fits(
-    hdulist, schema, context, ignore_unrecognized_tag=False, ignore_missing_extensions=False
+    hdulist,
+    schema,
+    context,
+    ignore_unrecognized_tag=False,
+    ignore_missing_extensions=False,
+    lazy_arrays=False,
+    arrays=None,
+    exclude_arrays=None,
+    max_workers=None,
+    lazy_extra_fits=False,
+    _open_context=None,
 ):
     """
     Read model information from a FITS HDU list.
@@ -790,17 +2191,46 @@ def from_fits(
     ignore_missing_extensions : bool, optional
         If `True`, ignore missing extensions in the ASDF file.
         If `False`, raise an error when an extension is missing.
+    lazy_arrays : bool, optional
+        If `True`, defer reading array data until it is first accessed.
+        The caller is responsible for keeping ``hdulist`` open while
+        the returned tree is in use.
+    arrays : list of str, optional
+        If given, only read the arrays at these dot-separated names or
+        glob patterns, for example ``["data", "dq"]``.
+    exclude_arrays : list of str, optional
+        Do not read the arrays at these dot-separated names or glob patterns.
+    max_workers : int, optional
+        If given, all arrays are read before returning, overriding
+        ``lazy_arrays``, and converted to their schema datatypes by a
+        pool of this many threads.
+    lazy_extra_fits : bool, optional
+        If `True`, and ``lazy_arrays`` is `True`, defer collecting the
+        header cards and data not described by the schema into
+        ``extra_fits`` until it is first accessed.
+    _open_context : _FitsOpenContext, optional
+        The context ``hdulist`` was opened with, to reuse its HDU index.
 
     Returns
     -------
     asdf.AsdfFile
         The ASDF file object
     """
+    if max_workers is not None:
+        lazy_extra_fits = lazy_extra_fits and lazy_arrays
+        lazy_arrays = True
+
+    if _open_context is not None:
+        hdus = _open_context.hdus_for(hdulist)
+    else:
+        hdus = _HDUIndex.for_hdulist(hdulist)
     try:
         ff = from_fits_asdf(
             hdulist,
             ignore_missing_extensions=ignore_missing_extensions,
             ignore_unrecognized_tag=ignore_unrecognized_tag,
+            lazy_arrays=lazy_arrays,
+            _hdus=hdus,
         )
     except Exception as exc:
         raise exc.__class__("ERROR loading embedded ASDF: " + str(exc)) from exc
@@ -809,18 +2239,121 @@ def from_fits(
     skip_fits_update = _can_skip_fits_update(hdulist, ff, context)
 
     known_keywords, known_datas = _load_from_schema(
-        hdulist, schema, ff.tree, context, skip_fits_update=skip_fits_update
+        hdulist,
+        schema,
+        ff.tree,
+        context,
+        skip_fits_update=skip_fits_update,
+        lazy_arrays=lazy_arrays,
+        arrays=arrays,
+        exclude_arrays=exclude_arrays,
+        hdus=hdus,
     )
+    if max_workers is not None:
+        _read_arrays(ff.tree, max_workers)
+
     if not skip_fits_update:
-        _load_extra_fits(hdulist, known_keywords, known_datas, ff.tree)
+        _load_extra_fits(
+            hdulist, known_keywords, known_datas, ff.tree, lazy=lazy_extra_fits and lazy_arrays
+        )
 
     _load_history(hdulist, ff.tree)
 
     return ff
 
 
+def _read_arrays(tree, max_workers):
+    """
+    Read the lazily loaded FITS arrays of a tree, converting them concurrently.
+
+    The data units are read one at a time, since astropy reads them
+    through the file object shared by the HDU list. Converting them to
+    the schema datatypes, which is mostly byte swapping that releases
+    the GIL, is done by a pool of threads. The placeholders are kept,
+    holding the loaded arrays, so arrays are still validated when first
+    accessed.
+
+    Parameters
+    ----------
+    tree : dict
+        The ASDF tree with lazy array placeholders.
+    max_workers : int
+        The number of threads.
+    """
+    placeholders = util._find_lazy(tree, util._LazyArray)
+    for _, _, placeholder in placeholders:
+        # the HDU is the first argument of all FITS array loaders
+        _hdu_data(placeholder._args[0])
+
+    def make_array(item):
+        return item[2]._make_array()
+
+    if max_workers <= 1 or len(placeholders) <= 1:
+        arrays = map(make_array, placeholders)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # map keeps the order, so the tree is filled in deterministically
+            arrays = list(executor.map(make_array, placeholders))
+    for (node, key, _), array in zip(placeholders, arrays, strict=True):
+        node[key] = util._LazyArray(_loaded_array, array)
+
+
+def _loaded_array(array):
+    return array
+
+
+class _BufferReader(io.RawIOBase):
+    """
+    A read-only, seekable file over a buffer.
+
+    Unlike `io.BytesIO` the buffer is not copied, so the ASDF extension
+    is parsed straight from the FITS table data.
+
+    Parameters
+    ----------
+    buffer : buffer
+        Any object supporting the buffer protocol, such as the data of
+        the ASDF extension.
+    """
+
+    def __init__(self, buffer):
+        super().__init__()
+        self._buffer = memoryview(np.frombuffer(buffer, dtype=np.uint8))
+        self._position = 0
+
+    def readable(self):  # noqa: D102
+        return True
+
+    def seekable(self):  # noqa: D102
+        return True
+
+    def tell(self):  # noqa: D102
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):  # noqa: D102
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._buffer)
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+        self._position = offset
+        return offset
+
+    def readinto(self, b):  # noqa: D102
+        chunk = self._buffer[self._position : self._position + len(b)]
+        b[: len(chunk)] = chunk
+        self._position += len(chunk)
+        return len(chunk)
+
+
 def from_fits_asdf(
-    hdulist, ignore_unrecognized_tag=False, ignore_missing_extensions=False, **kwargs
+    hdulist,
+    ignore_unrecognized_tag=False,
+    ignore_missing_extensions=False,
+    lazy_arrays=False,
+    _hdus=None,
+    **kwargs,
 ):
     """
     Open the ASDF extension from a FITS HDUlist.
@@ -835,6 +2368,10 @@ def from_fits_asdf(
     ignore_missing_extensions : bool
         When `True`, ignore missing extensions in the ASDF file.
         When `False`, raise an error when an extension is missing.
+    lazy_arrays : bool
+        When `True`, arrays stored in FITS extensions are read on first access.
+    _hdus : _HDUIndex, optional
+        Index of the HDUs of ``hdulist``, built if not given.
     **kwargs : dict
         Additional keyword arguments to pass to `asdf.open`.
         Usage of kwargs is deprecated and will be removed in a future version.
@@ -844,15 +2381,16 @@ def from_fits_asdf(
     asdf.AsdfFile
         The ASDF file object
     """
-    try:
-        asdf_extension = hdulist[_ASDF_EXTENSION_NAME]
-    except (KeyError, IndexError, AttributeError):
+    if _hdus is None:
+        _hdus = _HDUIndex.for_hdulist(hdulist)
+    asdf_extension = _hdus.get(_ASDF_EXTENSION_NAME)
+    if asdf_extension is None:
         # This means there is no ASDF extension
         return asdf.AsdfFile(
             ignore_unrecognized_tag=ignore_unrecognized_tag,
         )
 
-    generic_file = generic_io.get_file(io.BytesIO(asdf_extension.data), mode="rw")
+    generic_file = generic_io.get_file(_BufferReader(asdf_extension.data), mode="r")
     af = asdf.open(
         generic_file,
         ignore_unrecognized_tag=ignore_unrecognized_tag,
@@ -860,11 +2398,14 @@ def from_fits_asdf(
         **kwargs,
     )
     # map hdulist to blocks here
-    _map_hdulist_to_arrays(hdulist, af)
+    _map_hdulist_to_arrays(hdulist, af, lazy=lazy_arrays, hdus=_hdus)
     return af
 
 
-def _map_hdulist_to_arrays(hdulist, af):
+def _map_hdulist_to_arrays(hdulist, af, lazy=False, hdus=None):
+    if hdus is None:
+        hdus = _HDUIndex.for_hdulist(hdulist)
+
     def callback(node):
         if (
             isinstance(node, NDArrayType)
@@ -884,8 +2425,13 @@ def _map_hdulist_to_arrays(hdulist, af):
                     pair = (parts.group("name"), ver)
                 else:
                     pair = ver
-            data = hdulist[pair].data
-            return data
+            hdu = hdus.get(pair)
+            if hdu is None:
+                # let the HDUList raise its usual error
+                hdu = hdulist[pair]
+            if lazy:
+                return util._LazyArray(_hdu_data, hdu, section_loader=_read_hdu_section)
+            return hdu.data
         return node
 
     # don't assign to af.tree to avoid an extra validation
@@ -964,7 +2510,14 @@ def _can_skip_fits_update(hdulist, asdf_struct, context):
 
     # Check for FITS hash and compare to current. If equal, automatically skip.
     if asdf_struct.tree.get(FITS_HASH_KEY, None) is not None:
-        if asdf_struct.tree[FITS_HASH_KEY] == fits_hash(hdulist):
+        # Files without a recorded algorithm used the original one
+        algorithm = asdf_struct.tree.get(FITS_HASH_ALGORITHM_KEY, "sha256")
+        if algorithm not in _FITS_HASH_ALGORITHMS:
+            log.debug(
+                f"Unknown FITS hash algorithm {algorithm}. Cannot skip updating from FITS headers."
+            )
+            return False
+        if asdf_struct.tree[FITS_HASH_KEY] == fits_hash(hdulist, algorithm=algorithm):
             log.debug("FITS hash matches. Skipping FITS updating.")
             return True
 
@@ -972,7 +2525,49 @@ def _can_skip_fits_update(hdulist, asdf_struct, context):
     return False
 
 
-def fits_hash(hdulist):
+def _raw_header_block(hdu):
+    """
+    Read the header block of an HDU as stored in its file.
+
+    Parameters
+    ----------
+    hdu : astropy.io.fits.hdu.base._BaseHDU
+        The HDU.
+
+    Returns
+    -------
+    bytes or None
+        The header bytes, `None` if the HDU isn't backed by a file, its
+        header was modified after it was read or the private astropy
+        attributes this relies on are not available. The header is then
+        rendered instead.
+    """
+    # these are astropy internals, so any of them may go away
+    fileobj = getattr(hdu, "_file", None)
+    header_offset = getattr(hdu, "_header_offset", None)
+    data_offset = getattr(hdu, "_data_offset", None)
+    modified = getattr(getattr(hdu, "_header", None), "_modified", None)
+    if (
+        fileobj is None
+        or fileobj.closed
+        or header_offset is None
+        or data_offset is None
+        or modified is None
+        or modified
+        # the header of a compressed image is not the one in the file
+        or isinstance(hdu, fits.CompImageHDU)
+    ):
+        return None
+
+    position = fileobj.tell()
+    try:
+        fileobj.seek(header_offset)
+        return fileobj.read(data_offset - header_offset)
+    finally:
+        fileobj.seek(position)
+
+
+def fits_hash(hdulist, algorithm=FITS_HASH_ALGORITHM):
     """
     Calculate a hash based on all HDU headers.
 
@@ -982,19 +2577,39 @@ def fits_hash(hdulist):
     ----------
     hdulist : astropy.fits.HDUList
         The FITS structure.
+    algorithm : {"sha256-header-blocks", "sha256"}, optional
+        With "sha256" the hash is computed over the text rendering of
+        every header. With "sha256-header-blocks" headers read from a
+        file and left unmodified are hashed from the header block bytes
+        in the file, which avoids rendering the header. The two agree
+        for headers written by astropy.
 
     Returns
     -------
     fits_hash : str
         The hash of all HDU headers.
     """
+    if algorithm not in _FITS_HASH_ALGORITHMS:
+        raise ValueError(f"Unknown FITS hash algorithm {algorithm}")
+
     fits_hash = hashlib.sha256()
 
     # Ignore FITS header warnings, such as "Card is too long".
     # Such issues are inconsequential to hash calculation.
     with warnings.catch_warnings():
         warnings.simplefilter("ignore", AstropyWarning)
-        fits_hash.update("".join(str(hdu.header) for hdu in hdulist if hdu.name != "ASDF").encode())
+        if algorithm == "sha256":
+            fits_hash.update(
+                "".join(str(hdu.header) for hdu in hdulist if hdu.name != "ASDF").encode()
+            )
+        else:
+            for hdu in hdulist:
+                if hdu.name == "ASDF":
+                    continue
+                block = _raw_header_block(hdu)
+                if block is None:
+                    block = hdu.header.tostring().encode()
+                fits_hash.update(block)
     return fits_hash.hexdigest()
 
 
@@ -106,7 +106,7 @@ from .trapdensity import TrapDensityModel
 from .trappars import TrapParsModel
 from .trapsfilled import TrapsFilledModel
 from .tsophot import TsoPhotModel
-from .util import open, read_metadata  # noqa: A004
+from .util import open, read_metadata, read_metadata_many, resolve_model_class  # noqa: A004
 from .wavemap import WaveMapModel, WaveMapSingleModel
 from .wcs_ref_models import (
     CameraModel,
@@ -275,10 +275,12 @@ __all__ = [
     "WfssBkgModel",
     "open",
     "read_metadata",
+    "read_metadata_many",
+    "resolve_model_class",
 ]
 
 
-_all_models = __all__[:-2]
+_all_models = __all__[:-4]
 _deprecated_models = ["AmiLgModel"]
 _local_dict = locals()
 _defined_models = {k: _local_dict[k] for k in _all_models}
@@ -50,5 +50,5 @@ class WfssBkgModel(ReferenceFileModel):
         self.dq = dynamic_mask(self, pixel)
 
         # Implicitly create arrays
-        self.dq = self.dq
-        self.err = self.err
+        self._init_array("dq")
+        self._init_array("err")
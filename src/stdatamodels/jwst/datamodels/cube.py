@@ -35,5 +35,5 @@ class CubeModel(JwstDataModel):
         super(CubeModel, self).__init__(init=init, **kwargs)
 
         # Implicitly create arrays
-        self.dq = self.dq
-        self.err = self.err
+        self._init_array("dq")
+        self._init_array("err")
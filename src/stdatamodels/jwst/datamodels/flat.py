@@ -30,4 +30,4 @@ class FlatModel(ReferenceFileModel):
         self.dq = dynamic_mask(self, pixel)
 
         # Implicitly create arrays
-        self.err = self.err
+        self._init_array("err")
@@ -30,5 +30,5 @@ class FringeModel(ReferenceFileModel):
         self.dq = dynamic_mask(self, pixel)
 
         # Implicitly create arrays
-        self.dq = self.dq
-        self.err = self.err
+        self._init_array("dq")
+        self._init_array("err")
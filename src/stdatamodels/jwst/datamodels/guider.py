@@ -33,8 +33,8 @@ class GuiderRawModel(JwstDataModel):
         super(GuiderRawModel, self).__init__(init=init, **kwargs)
 
         # Implicitly create arrays
-        self.dq = self.dq
-        self.err = self.err
+        self._init_array("dq")
+        self._init_array("err")
 
 
 class GuiderCalModel(JwstDataModel):
@@ -67,5 +67,5 @@ class GuiderCalModel(JwstDataModel):
         super(GuiderCalModel, self).__init__(init=init, **kwargs)
 
         # Implicitly create arrays
-        self.dq = self.dq
-        self.err = self.err
+        self._init_array("dq")
+        self._init_array("err")
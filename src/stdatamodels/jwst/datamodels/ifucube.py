@@ -27,5 +27,5 @@ class IFUCubeModel(JwstDataModel):
         super(IFUCubeModel, self).__init__(init=init, **kwargs)
 
         # Implicitly create arrays
-        self.dq = self.dq
-        self.err = self.err
+        self._init_array("dq")
+        self._init_array("err")
@@ -37,5 +37,5 @@ class IFUImageModel(JwstDataModel):
         super(IFUImageModel, self).__init__(init=init, **kwargs)
 
         # Implicitly create arrays
-        self.dq = self.dq
-        self.err = self.err
+        self._init_array("dq")
+        self._init_array("err")
@@ -28,7 +28,7 @@ class LinearityModel(ReferenceFileModel):
         self.dq = dynamic_mask(self, pixel)
 
         # Implicitly create arrays
-        self.dq = self.dq
+        self._init_array("dq")
 
     def get_primary_array_name(self):  # noqa: D102
         return "coeffs"
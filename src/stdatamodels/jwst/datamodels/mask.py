@@ -27,7 +27,7 @@ class MaskModel(ReferenceFileModel):
             self.dq = dynamic_mask(self, pixel)
 
         # Implicitly create arrays
-        self.dq = self.dq
+        self._init_array("dq")
 
     def get_primary_array_name(self):  # noqa: D102
         return "dq"
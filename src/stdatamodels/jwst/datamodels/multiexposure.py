@@ -3,6 +3,8 @@ from copy import deepcopy
 from asdf import schema as asdf_schema
 from asdf import treeutil
 
+from stdatamodels.schema import load_merged_schema
+
 from .image import ImageModel
 from .model_base import JwstDataModel
 from .slit import SlitDataModel, SlitModel
@@ -49,8 +51,8 @@ class MultiExposureModel(JwstDataModel):
     core_schema_url = "http://stsci.edu/schemas/jwst_datamodel/core.schema"
 
     def __init__(self, init=None, **kwargs):
-        # Lets create a schema
-        schema = self._build_schema()
+        # Lets create a schema, or reuse the one built for a previous instance
+        schema = load_merged_schema(self.schema_url, builder=self._build_schema)
 
         if isinstance(init, (SlitModel, SlitDataModel, ImageModel)):
             super(MultiExposureModel, self).__init__(init=None, schema=schema, **kwargs)
@@ -75,7 +77,8 @@ class MultiExposureModel(JwstDataModel):
 
         super(MultiExposureModel, self).__init__(init=init, schema=schema, **kwargs)
 
-    def _build_schema(self):
+    @classmethod
+    def _build_schema(cls):
         """
         Build the schema, incorporating the core.
 
@@ -85,8 +88,8 @@ class MultiExposureModel(JwstDataModel):
             The schema for the model.
         """
         # Get the schemas
-        schema = asdf_schema.load_schema(self.schema_url, resolve_references=True)
-        core_schema = asdf_schema.load_schema(self.core_schema_url, resolve_references=True)
+        schema = asdf_schema.load_schema(cls.schema_url, resolve_references=True)
+        core_schema = asdf_schema.load_schema(cls.core_schema_url, resolve_references=True)
 
         # Create a new core.meta that will co-locate
         # with each exposure entry. This is done
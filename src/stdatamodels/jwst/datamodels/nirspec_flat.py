@@ -67,8 +67,8 @@ class NirspecFlatModel(ReferenceFileModel):
             self.dq = dynamic_mask(self, pixel)
 
         # Implicitly create arrays
-        self.dq = self.dq
-        self.err = self.err
+        self._init_array("dq")
+        self._init_array("err")
 
     def _migrate_hdulist(self, hdulist):
         return _migrate_fast_variation_table(hdulist)
@@ -28,4 +28,4 @@ class PersistenceSatModel(ReferenceFileModel):
         self.dq = dynamic_mask(self, pixel)
 
         # Implicitly create arrays
-        self.dq = self.dq
+        self._init_array("dq")
@@ -23,5 +23,5 @@ class QuadModel(JwstDataModel):
         super(QuadModel, self).__init__(init=init, **kwargs)
 
         # Implicitly create arrays
-        self.dq = self.dq
-        self.err = self.err
+        self._init_array("dq")
+        self._init_array("err")
@@ -29,5 +29,5 @@ class RampModel(JwstDataModel):
         super(RampModel, self).__init__(init=init, **kwargs)
 
         # Implicitly create arrays
-        self.pixeldq = self.pixeldq
-        self.groupdq = self.groupdq
+        self._init_array("pixeldq")
+        self._init_array("groupdq")
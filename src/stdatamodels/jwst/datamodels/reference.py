@@ -104,8 +104,8 @@ class ReferenceImageModel(ReferenceFileModel):
         super(ReferenceImageModel, self).__init__(init=init, **kwargs)
 
         # Implicitly create arrays
-        self.dq = self.dq
-        self.err = self.err
+        self._init_array("dq")
+        self._init_array("err")
 
         if self.hasattr("dq_def"):
             self.dq = dynamic_mask(self, pixel)
@@ -131,8 +131,8 @@ class ReferenceCubeModel(ReferenceFileModel):
         super(ReferenceCubeModel, self).__init__(init=init, **kwargs)
 
         # Implicitly create arrays
-        self.dq = self.dq
-        self.err = self.err
+        self._init_array("dq")
+        self._init_array("err")
 
 
 class ReferenceQuadModel(ReferenceFileModel):
@@ -155,5 +155,5 @@ class ReferenceQuadModel(ReferenceFileModel):
         super(ReferenceQuadModel, self).__init__(init=init, **kwargs)
 
         # Implicitly create arrays
-        self.dq = self.dq
-        self.err = self.err
+        self._init_array("dq")
+        self._init_array("err")
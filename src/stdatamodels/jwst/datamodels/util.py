@@ -1,9 +1,15 @@
 """Various utility functions and data types."""
 
 import io
+import itertools
 import logging
+import os
+import pickle
 import warnings
+from collections import namedtuple
 from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 
 import asdf
@@ -14,7 +20,8 @@ from astropy.io import fits
 import stdatamodels.jwst.datamodels as dm
 from stdatamodels import filetype, fits_support
 from stdatamodels.exceptions import NoTypeWarning
-from stdatamodels.model_base import _FileReference
+from stdatamodels.model_base import _asdf_open_kwargs, _FileReference, _fits_open_kwargs
+from stdatamodels.schema import load_merged_schema
 
 __all__ = ["is_association", "open"]
 
@@ -68,6 +75,29 @@ def open(init=None, guess=True, **kwargs):  # noqa: A001
           If `True`, arrays will be validated against ndim, max_ndim, and datatype
           validators in the schemas.
 
+        - mmap_mode : {None, "r", "c"}
+          Memory map the arrays of a FITS or ASDF file instead of reading them
+          into memory, see :class:`~stdatamodels.DataModel`.
+
+        - lazy_arrays : bool
+          Only read the arrays of a FITS file when they are first accessed,
+          keeping the file open until the model is closed, see
+          :class:`~stdatamodels.DataModel`.
+
+        - arrays, exclude_arrays : list of str
+          Only read (or skip) these arrays of a FITS file, for example
+          ``arrays=["data", "dq"]``, see :class:`~stdatamodels.DataModel`.
+
+        - max_workers : int
+          Read all arrays of a FITS file when it is opened, converting them
+          with this many threads, see :class:`~stdatamodels.DataModel`.
+
+        - lazy_extra_fits : bool
+          Only collect the FITS header cards and extensions not described by
+          the schema into ``extra_fits`` when it is first accessed (with
+          ``lazy_arrays``), see
+          :class:`~stdatamodels.DataModel`.
+
     Returns
     -------
     DataModel
@@ -87,12 +117,13 @@ def open(init=None, guess=True, **kwargs):  # noqa: A001
     """
     if "memmap" in kwargs:
         warnings.warn(
-            "Memory mapping is no longer supported; memmap is hard-coded to False "
-            "and the keyword argument no longer has any effect.",
+            "The memmap keyword argument is deprecated and no longer has any effect; "
+            "use mmap_mode to memory map arrays.",
             DeprecationWarning,
             stacklevel=2,
         )
         kwargs.pop("memmap")
+    mmap_mode = kwargs.pop("mmap_mode", None)
 
     # Initialize variables used to select model class
 
@@ -100,6 +131,7 @@ def open(init=None, guess=True, **kwargs):  # noqa: A001
     shape = ()
     file_name = None
     file_to_close = None
+    open_context = None
 
     # Get special cases for opening a model out of the way
     # all special cases return a model if they match
@@ -123,7 +155,7 @@ def open(init=None, guess=True, **kwargs):  # noqa: A001
         file_type = filetype.check(init)
 
         if file_type == "fits":
-            hdulist = fits.open(init, memmap=False)
+            hdulist = fits.open(init, **_fits_open_kwargs(mmap_mode))
             file_to_close = hdulist
 
         elif file_type == "asn":
@@ -138,7 +170,7 @@ def open(init=None, guess=True, **kwargs):  # noqa: A001
             return ModelContainer(init, **kwargs)
 
         elif file_type == "asdf":
-            asdffile = asdf.open(init, memmap=False)
+            asdffile = asdf.open(init, **_asdf_open_kwargs(mmap_mode))
 
             # Detect model type, then get defined model, and call it.
             new_class = _class_from_model_type(asdffile)
@@ -195,47 +227,27 @@ def open(init=None, guess=True, **kwargs):  # noqa: A001
     else:
         raise TypeError(f"Unsupported type for init argument to open {type(init)}")
 
-    # If we have it, determine the shape from the science hdu
+    signature = _ClassSignature.from_shape(shape)
     if hdulist:
         # So we don't need to open the image twice
         init = hdulist
-        info = init.fileinfo(0)
-        if info is not None:
-            file_name = info.get("filename")
-
-        try:
-            hdu = hdulist[("SCI", 1)]
-        except (KeyError, NameError):
-            shape = ()
-        else:
-            if hasattr(hdu, "shape"):
-                shape = hdu.shape
-            else:
-                shape = ()
+        # Shared with the model so the HDUs are only indexed once
+        open_context = fits_support._FitsOpenContext(
+            hdulist, lazy_arrays=file_to_close is not None and kwargs.get("lazy_arrays", False)
+        )
+        file_name = open_context.filename
+        signature = _ClassSignature.from_hdus(open_context.hdus)
 
-    # First try to get the class name from the primary header
-    new_class = _class_from_model_type(hdulist)
-    has_model_type = new_class is not None
-    if not guess and not has_model_type:
+    new_class = _class_from_signature(signature, guess=guess)
+    if new_class is None:
         if file_to_close is not None:
             file_to_close.close()
-        raise TypeError("Model type is not specifically defined and guessing has been disabled.")
-
-    # Special handling for ramp files for backwards compatibility
-    if new_class is None:
-        new_class = _class_from_ramp_type(hdulist, shape)
-
-    # Or get the class from the reference file type and other header keywords
-    if new_class is None:
-        new_class = _class_from_reftype(hdulist, shape)
-
-    # Or Get the class from the shape
-    if new_class is None:
-        new_class = _class_from_shape(hdulist, shape)
-
-    # Throw an error if these attempts were unsuccessful
-    if new_class is None:
+        if not guess:
+            raise TypeError(
+                "Model type is not specifically defined and guessing has been disabled."
+            )
         raise TypeError("Can't determine datamodel class from argument to open")
+    has_model_type = signature.model_type in _get_defined_models()
 
     # Log a message about how the model was opened
     if file_name:
@@ -244,6 +256,8 @@ def open(init=None, guess=True, **kwargs):  # noqa: A001
         log.debug(f"Opening as {new_class}")
 
     # Actually open the model
+    if open_context is not None:
+        kwargs["_open_context"] = open_context
     try:
         model = new_class(init, **kwargs)
     except Exception:
@@ -311,126 +325,217 @@ def _class_from_model_type(init):
     return new_class
 
 
-def _class_from_ramp_type(hdulist, shape):
+class _ClassSignature(
+    namedtuple("_ClassSignature", ["model_type", "ndim", "has_reftype", "no_dq", "multi_sci"])
+):
     """
-    Check to see if file is ramp file.
+    What the model class of a file is chosen by.
 
-    Parameters
+    Attributes
     ----------
-    hdulist : HDUList
-        The HDUList object
-    shape : tuple
-        The shape of the data
-
-    Returns
-    -------
-    RampModel
-        The model class to use
+    model_type : str or None
+        The DATAMODL keyword.
+    ndim : int
+        The number of dimensions of the first SCI extension, 0 if there
+        is none.
+    has_reftype : bool
+        If the file has a REFTYPE keyword.
+    no_dq : bool
+        If the file has no DQ extension.
+    multi_sci : bool
+        If the file has more than one SCI extension.
     """
-    if not hdulist:
-        new_class = None
-    else:
-        if len(shape) == 4:
-            try:
-                hdulist["DQ"]
-            except KeyError:
-                from . import ramp
-
-                new_class = ramp.RampModel
-            else:
-                new_class = None
-        else:
-            new_class = None
-
-    return new_class
 
+    __slots__ = ()
+
+    @classmethod
+    def from_shape(cls, shape):
+        """
+        Get the signature of a model created from a shape, not a file.
+
+        Parameters
+        ----------
+        shape : tuple
+            The shape of the model.
+
+        Returns
+        -------
+        _ClassSignature
+            The signature.
+        """
+        return cls(None, len(shape), False, False, False)
+
+    @classmethod
+    def from_hdus(cls, hdus):
+        """
+        Get the signature of a FITS file.
+
+        Parameters
+        ----------
+        hdus : _HDUIndex
+            The index of the HDUs of the file.
+
+        Returns
+        -------
+        _ClassSignature
+            The signature.
+        """
+        header = hdus.get(0).header
+        sci = hdus.get(("SCI", 1))
+        return cls(
+            header.get("DATAMODL"),
+            len(getattr(sci, "shape", ())),
+            header.get("REFTYPE") is not None,
+            hdus.get("DQ") is None,
+            hdus.get(("SCI", 2)) is not None,
+        )
 
-def _class_from_reftype(hdulist, shape):
+    @classmethod
+    def from_header(cls, header):
+        """
+        Get the signature of a FITS file from its primary header alone.
+
+        The file is taken to have no extensions.
+
+        Parameters
+        ----------
+        header : astropy.io.fits.Header
+            The primary header.
+
+        Returns
+        -------
+        _ClassSignature
+            The signature.
+        """
+        return cls(header.get("DATAMODL"), 0, header.get("REFTYPE") is not None, False, False)
+
+
+def _guess_class_name(ndim, has_reftype, no_dq, multi_sci):
+    # The class of a file without a known DATAMODL
+    if ndim == 4 and no_dq:
+        # Special handling for ramp files for backwards compatibility
+        return "RampModel"
+    if has_reftype:
+        # Or get the class from the reference file type
+        return _REFERENCE_CLASS_NAMES.get(ndim)
+    if ndim == 2 and multi_sci:
+        return "MultiSlitModel"
+    # Or get the class from the shape
+    return _SHAPE_CLASS_NAMES.get(ndim)
+
+
+_REFERENCE_CLASS_NAMES = {
+    0: "ReferenceFileModel",
+    2: "ReferenceImageModel",
+    3: "ReferenceCubeModel",
+    4: "ReferenceQuadModel",
+}
+_SHAPE_CLASS_NAMES = {0: "JwstDataModel", 2: "ImageModel", 3: "CubeModel", 4: "QuadModel"}
+
+# The guessed class names by (ndim, has_reftype, no_dq, multi_sci), so
+# choosing the class takes one lookup. Other numbers of dimensions have
+# no class.
+_GUESSED_CLASS_NAMES = {
+    key: name
+    for key in itertools.product(range(5), (False, True), (False, True), (False, True))
+    if (name := _guess_class_name(*key)) is not None
+}
+
+
+def _get_defined_models():
+    from . import _defined_models
+
+    return _defined_models
+
+
+def _class_from_signature(signature, guess=True):
     """
-    Get the class name from the reftype and other header keywords.
+    Get the model class for a file from its signature.
 
     Parameters
     ----------
-    hdulist : HDUList
-        The HDUList object
-    shape : tuple
-        The shape of the data
+    signature : _ClassSignature
+        The signature of the file.
+    guess : bool, optional
+        If `False`, only use the DATAMODL keyword.
 
     Returns
     -------
-    ReferenceDataModel
-        The model class to use
+    type or None
+        The model class, `None` if it can't be determined.
     """
-    if not hdulist:
-        new_class = None
-
-    else:
-        primary = hdulist[0]
-        reftype = primary.header.get("REFTYPE")
-        if reftype is None:
-            new_class = None
+    defined_models = _get_defined_models()
+    new_class = defined_models.get(signature.model_type)
+    if new_class is None and guess:
+        name = _GUESSED_CLASS_NAMES.get(signature[1:])
+        if name is not None:
+            new_class = defined_models[name]
+    return new_class
 
-        else:
-            from . import reference
-
-            if len(shape) == 0:
-                new_class = reference.ReferenceFileModel
-            elif len(shape) == 2:
-                new_class = reference.ReferenceImageModel
-            elif len(shape) == 3:
-                new_class = reference.ReferenceCubeModel
-            elif len(shape) == 4:
-                new_class = reference.ReferenceQuadModel
-            else:
-                new_class = None
 
-    return new_class
+def _hdulist_signature(hdulist):
+    # The extensions are only read if the class has to be guessed
+    signature = _ClassSignature.from_header(hdulist[0].header)
+    if signature.model_type in _get_defined_models():
+        return signature
+    return _ClassSignature.from_hdus(fits_support._HDUIndex.for_hdulist(hdulist))
 
 
-def _class_from_shape(hdulist, shape):
+def resolve_model_class(init, guess=True):
     """
-    Get the class name from the shape.
+    Get the model class `open` would open a file as, without opening the model.
+
+    Only the primary header of a FITS file is read, or all of its
+    headers if the model type is not stored in the file, so this can
+    be used to route many files, for example to the step or worker handling each
+    model class, before opening any of them.
 
     Parameters
     ----------
-    hdulist : HDUList
-        The HDUList object
-    shape : tuple
-        The shape of the data
+    init : str, pathlib.Path, astropy.io.fits.HDUList or astropy.io.fits.Header
+        A FITS or ASDF file path, an open FITS file, or the primary
+        header of a FITS file. Without the extensions of a file, a
+        header that has no known DATAMODL keyword is resolved as for a
+        file without extensions.
+    guess : bool, optional
+        If `False`, only use the model type stored in the file, as with
+        `open`.
 
     Returns
     -------
-    DataModel
-        The model class to use
-    """
-    if len(shape) == 0:
-        from . import model_base
-
-        new_class = model_base.JwstDataModel
-    elif len(shape) == 4:
-        from . import quad
-
-        new_class = quad.QuadModel
-    elif len(shape) == 3:
-        from . import cube
-
-        new_class = cube.CubeModel
-    elif len(shape) == 2:
-        try:
-            hdulist[("SCI", 2)]
-        except (KeyError, NameError):
-            # It's an ImageModel
-            from . import image
+    type
+        The model class.
 
-            new_class = image.ImageModel
+    Raises
+    ------
+    TypeError
+        If the model class can't be determined.
+    """
+    if isinstance(init, fits.Header):
+        signature = _ClassSignature.from_header(init)
+    elif isinstance(init, fits.HDUList):
+        signature = _hdulist_signature(init)
+    elif isinstance(init, (str, Path)):
+        file_type = filetype.check(init)
+        if file_type == "fits":
+            with fits.open(init) as hdulist:
+                signature = _hdulist_signature(hdulist)
+        elif file_type == "asdf":
+            with asdf.open(init, **_asdf_open_kwargs(None)) as asdffile:
+                # open does not guess the class of ASDF files
+                return _class_from_model_type(asdffile) or dm.JwstDataModel
         else:
-            # It's a MultiSlitModel
-            from . import multislit
-
-            new_class = multislit.MultiSlitModel
+            raise TypeError(f"Can't determine datamodel class of {file_type} file {init}")
     else:
-        new_class = None
+        raise TypeError(f"Unsupported type for init argument to resolve_model_class {type(init)}")
 
+    new_class = _class_from_signature(signature, guess=guess)
+    if new_class is None:
+        if not guess:
+            raise TypeError(
+                "Model type is not specifically defined and guessing has been disabled."
+            )
+        raise TypeError("Can't determine datamodel class from argument to resolve_model_class")
     return new_class
 
 
@@ -511,15 +616,15 @@ def _to_flat_dict(tree):
 
 
 def _retrieve_schema(model_type):
-    """Load schema for the input model type."""  # numpydoc ignore=RT01
+    """Load the (cached) merged schema for the input model type."""  # numpydoc ignore=RT01
     try:
         schema_url = getattr(dm, model_type).schema_url
     except AttributeError:
         raise ValueError(f"Model type {model_type} not found.") from None
-    return asdf.schema.load_schema(schema_url, resolve_references=True)
+    return load_merged_schema(schema_url)
 
 
-def read_metadata(fname, model_type=None, flatten=True):
+def read_metadata(fname, model_type=None, flatten=True, fields=None):
     """
     Load a metadata tree from a file without loading the entire datamodel into memory.
 
@@ -536,6 +641,8 @@ def read_metadata(fname, model_type=None, flatten=True):
     that are present in the FITS header and mapped to a schema element, as well
     as any extra attributes that are present in the ASDF extension of the FITS file.
     (If a header keyword is not mapped to a schema element, it will not be included.)
+    Only the headers and the ASDF extension are read from the file; the data
+    units of the other extensions are skipped without being read.
 
     For ASDF files, the output dictionary simply contains the entire ASDF tree.
 
@@ -559,6 +666,17 @@ def read_metadata(fname, model_type=None, flatten=True):
     flatten : bool, optional
         If True, the metadata will be returned as a flat dictionary. If False,
         the metadata will be returned as a nested dictionary. Default is True.
+    fields : list of str, optional
+        Only return these metadata elements, given as dot-separated names,
+        each of which may be a glob pattern, for example
+        ``["meta.instrument.*", "meta.exposure.start_time"]``. A name also
+        selects everything below it, and array items are selected by index
+        (``"slits.0.name"``) or with a wildcard (``"slits.*.name"``).
+        For FITS files, only the matching header keywords are read, and if every
+        field is the exact name of an element mapped to a FITS keyword, and all
+        of them are in the headers, the ASDF extension is not parsed at all.
+        Elements under ``meta.wcs`` are only returned with ``flatten=False``,
+        as the WCS is left out of flat dictionaries.
 
     Returns
     -------
@@ -568,22 +686,25 @@ def read_metadata(fname, model_type=None, flatten=True):
     if not isinstance(fname, (Path, str)):
         raise TypeError("Input must be a file path.")
 
+    if fields is not None:
+        fields = list(fields)
+
     ext = filetype.check(str(fname))
     if ext == "fits":
-        with fits.open(fname) as hdulist:
-            bs = io.BytesIO(hdulist["ASDF"].data.tobytes())
-            tree = asdf.util.load_yaml(bs)
-            if model_type is None:
-                model_type = hdulist[0].header["DATAMODL"]
-            schema = _retrieve_schema(model_type)
+        # Only the headers and the ASDF extension are read, data units are skipped
+        hdulist = fits_support._read_fits_headers(fname, data_extnames=("ASDF",))
+        if model_type is None:
+            model_type = hdulist[0].header["DATAMODL"]
+        schema = _retrieve_schema(model_type)
 
-            # hack to turn off validation without needing an entire datamodel object
-            class PlaceholderCtx:
-                def __init__(self):
-                    self._validate_on_assignment = False
+        # hack to turn off validation without needing an entire datamodel object
+        class PlaceholderCtx:
+            def __init__(self):
+                self._validate_on_assignment = False
 
-            context = PlaceholderCtx()
+        context = PlaceholderCtx()
 
+        def load_from_headers(tree):
             fits_support._load_from_schema(
                 hdulist,
                 schema,
@@ -592,7 +713,19 @@ def read_metadata(fname, model_type=None, flatten=True):
                 skip_fits_update=False,
                 ignore_arrays=True,
                 keep_unknown=False,
+                fields=fields,
             )
+            return tree
+
+        tree = None
+        if fields is not None and _fields_are_fits_keywords(fields, schema):
+            tree = load_from_headers({})
+            if not set(fields).issubset(_to_flat_dict(tree)):
+                # fields missing from the headers may be in the ASDF extension
+                tree = None
+        if tree is None:
+            bs = io.BytesIO(hdulist["ASDF"].raw_data)
+            tree = load_from_headers(asdf.util.load_yaml(bs))
 
     elif ext == "asdf":
         tree = asdf.util.load_yaml(fname, tagged=True)
@@ -604,11 +737,185 @@ def read_metadata(fname, model_type=None, flatten=True):
     # custom handling of cal_logs object to ensure it ends up as a single string
     _convert_cal_logs_to_string(tree)
 
+    if fields is not None:
+        tree = _select_fields(tree, fits_support._FieldMatcher(fields))
+
     if flatten:
         return _to_flat_dict(tree)
     return tree
 
 
+def _fields_are_fits_keywords(fields, schema):
+    """
+    Check if every field names an element that is mapped to a FITS keyword.
+
+    Parameters
+    ----------
+    fields : list of str
+        Dot-separated names or glob patterns.
+    schema : dict
+        The model schema.
+
+    Returns
+    -------
+    bool
+        True if the fields are exact (not glob) names of FITS keyword elements.
+    """
+    if any(fits_support._is_glob(field) for field in fields):
+        return False
+    keyword_paths = set()
+    for entry in fits_support._get_fits_schema_index(schema):
+        if entry.fits_keyword is not None:
+            keyword_paths.add(".".join("#" if part is None else part for part in entry.path))
+    return all(
+        ".".join("#" if part.isdigit() else part for part in field.split(".")) in keyword_paths
+        for field in fields
+    )
+
+
+def _select_fields(tree, matches, path=None, ancestors=None):
+    """
+    Remove the parts of a tree that were not selected.
+
+    Parameters
+    ----------
+    tree : dict or list
+        The tree.
+    matches : callable
+        Function that returns True for selected paths,
+        see `fits_support._FieldMatcher`.
+    path : list, optional
+        The path of ``tree``.
+    ancestors : set, optional
+        The ids of the containers of ``tree``, used to stop at
+        references back into the tree (such as in a WCS).
+
+    Returns
+    -------
+    dict or list
+        The pruned tree, lists keep their length so indices are unchanged.
+    """
+    if path is None:
+        path = []
+    if ancestors is None:
+        ancestors = set()
+    ancestors.add(id(tree))
+    if isinstance(tree, dict):
+        items = tree.items()
+        selected = {}
+    else:
+        items = enumerate(tree)
+        selected = [{} for _ in tree]
+    for key, val in items:
+        subpath = path + [key]
+        if matches(subpath):
+            selected[key] = val
+        elif isinstance(val, (dict, list, tuple)) and id(val) not in ancestors:
+            subtree = _select_fields(val, matches, subpath, ancestors)
+            if subtree:
+                selected[key] = subtree
+    ancestors.discard(id(tree))
+    if isinstance(selected, list) and not any(selected):
+        return []
+    return selected
+
+
+class MetadataResult(namedtuple("MetadataResult", ["path", "metadata", "error"])):
+    """
+    The metadata read from one file by `read_metadata_many`.
+
+    Attributes
+    ----------
+    path : str or Path
+        The file path, as given.
+    metadata : dict or None
+        The metadata as returned by `read_metadata`, `None` if reading failed.
+    error : Exception or None
+        The exception raised while reading the file, `None` on success.
+    """
+
+    __slots__ = ()
+
+
+def _read_metadata_worker(path, model_type, flatten, fields):
+    """
+    Read the metadata of one file for `read_metadata_many`.
+
+    Errors are returned instead of raised so that one bad file does not
+    end the batch.
+
+    Returns
+    -------
+    MetadataResult
+        The metadata or error for the file.
+    """
+    try:
+        metadata = read_metadata(path, model_type=model_type, flatten=flatten, fields=fields)
+    except Exception as error:
+        try:
+            # exceptions are sent back from worker processes by pickling
+            # them, and some can be pickled but not unpickled
+            pickle.loads(pickle.dumps(error))  # noqa: S301
+        except Exception:
+            error = RuntimeError(repr(error))
+        return MetadataResult(path, None, error)
+    return MetadataResult(path, metadata, None)
+
+
+def read_metadata_many(paths, workers=None, fields=None, model_type=None, flatten=True):
+    """
+    Read the metadata of many files, in parallel.
+
+    Files are read with `read_metadata` in a pool of worker processes
+    and the results are yielded in the order of ``paths`` as they become
+    available. Each worker caches the schemas it loads, so every model
+    type is only loaded once per worker for the whole batch.
+
+    Parameters
+    ----------
+    paths : iterable of str or Path
+        Paths of the FITS or ASDF files to read.
+    workers : int, optional
+        The number of worker processes. If None, the number of CPUs is
+        used. With 0 or 1 files are read one at a time in this process.
+    fields : list of str, optional
+        Passed to `read_metadata`, for example
+        ``["meta.instrument.name", "meta.exposure.start_time"]``.
+    model_type : str, optional
+        Passed to `read_metadata`.
+    flatten : bool, optional
+        Passed to `read_metadata`.
+
+    Yields
+    ------
+    MetadataResult
+        A named tuple of ``(path, metadata, error)`` for each file. Errors
+        raised while reading a file are returned in ``error`` instead of
+        being raised.
+    """
+    if fields is not None:
+        fields = list(fields)
+
+    paths = list(paths)
+    worker = partial(_read_metadata_worker, model_type=model_type, flatten=flatten, fields=fields)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(paths))
+    if workers <= 1:
+        for path in paths:
+            yield worker(path)
+        return
+
+    chunksize = max(1, len(paths) // (workers * 4))
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        yield from executor.map(worker, paths, chunksize=chunksize)
+    finally:
+        # don't finish the rest of the batch if the caller stops early
+        executor.shutdown(cancel_futures=True)
+
+
 def _convert_cal_logs_to_string(tree):
     """
     Convert cal_logs dictionary into a single string.
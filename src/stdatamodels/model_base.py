@@ -1,5 +1,6 @@
 """Data model class hierarchy."""
 
+import contextlib
 import copy
 import datetime
 import functools
@@ -11,16 +12,26 @@ from pathlib import Path, PurePath
 import asdf
 import numpy as np
 from asdf import AsdfFile
-from asdf import schema as asdf_schema
-from asdf.tags.core import NDArrayType
+from asdf.exceptions import ValidationError
+from asdf.tags.core import NDArrayType, ndarray
 from astropy.io import fits
 from astropy.time import Time
 from astropy.wcs import WCS
 
 from . import filetype, fits_support, properties, validate
 from . import schema as mschema
+from .exceptions import ValidationWarning
 from .history import HistoryList
-from .util import convert_fitsrec_to_array_in_tree, get_envar_as_boolean, remove_none_from_tree
+from .util import (
+    _find_lazy,
+    _Lazy,
+    _LazyArray,
+    _load_lazy,
+    convert_fitsrec_to_array_in_tree,
+    get_envar_as_boolean,
+    materialize_lazy,
+    remove_none_from_tree,
+)
 
 # This minimal schema creates metadata fields that
 # are accessed to be available by the core DataModel code.
@@ -40,6 +51,67 @@ _DEFAULT_SCHEMA = {
     },
 }
 
+# astropy.io.fits open modes used for each supported ``mmap_mode``.
+# "denywrite" maps the file read-only so in-place modification of an
+# array raises, "copyonwrite" maps it privately so modified pages are
+# never written back to the file.
+_FITS_MMAP_MODES = {
+    "r": "denywrite",
+    "c": "copyonwrite",
+}
+
+
+def _check_mmap_mode(mmap_mode):
+    if mmap_mode not in _FITS_MMAP_MODES:
+        raise ValueError(
+            f"Invalid mmap_mode {mmap_mode!r}; must be None or one of {sorted(_FITS_MMAP_MODES)}"
+        )
+
+
+def _fits_open_kwargs(mmap_mode):
+    """
+    Build the `astropy.io.fits.open` arguments for a ``mmap_mode``.
+
+    Parameters
+    ----------
+    mmap_mode : str or None
+        None to read arrays into memory, "r" for read-only memory maps
+        or "c" for copy-on-write memory maps.
+
+    Returns
+    -------
+    dict
+        Keyword arguments for `astropy.io.fits.open`.
+    """
+    if mmap_mode is None:
+        return {"memmap": False}
+    _check_mmap_mode(mmap_mode)
+    return {"memmap": None, "mode": _FITS_MMAP_MODES[mmap_mode]}
+
+
+def _asdf_open_kwargs(mmap_mode):
+    """
+    Build the `asdf.open` arguments for a ``mmap_mode``.
+
+    asdf only supports read-only memory maps so copy-on-write is rejected.
+
+    Parameters
+    ----------
+    mmap_mode : str or None
+        None to read arrays into memory or "r" for read-only memory maps.
+
+    Returns
+    -------
+    dict
+        Keyword arguments for `asdf.open`.
+    """
+    if mmap_mode is None:
+        return {"memmap": False}
+    _check_mmap_mode(mmap_mode)
+    if mmap_mode == "c":
+        raise ValueError("mmap_mode='c' (copy-on-write) is only supported for FITS files")
+    return {"memmap": True}
+
 
 class DataModel(properties.ObjectNode):
     """Base class of all of the data models."""
@@ -61,6 +133,12 @@ class DataModel(properties.ObjectNode):
         validate_arrays=False,
         ignore_missing_extensions=True,
         ignore_unrecognized_tag=False,
+        mmap_mode=None,
+        lazy_arrays=False,
+        arrays=None,
+        exclude_arrays=None,
+        max_workers=None,
+        lazy_extra_fits=False,
         **kwargs,
     ):
         """
@@ -131,6 +209,63 @@ class DataModel(properties.ObjectNode):
             When `False`, raise warnings when an unrecognized tag is encountered.
             When `True`, ignore unrecognized tags.
 
+        mmap_mode : {None, "r", "c"}
+            Only used when ``init`` is a file path. If `None` (the default),
+            all arrays are read into memory and the file is closed once the
+            model is constructed (unless ``lazy_arrays`` is `True`).
+            Otherwise arrays are memory mapped and the file stays open
+            until the model is closed:
+
+            - "r": arrays are read-only views of the file; modifying them in
+              place raises an error, assign a new array (or a copy) instead.
+            - "c": copy-on-write; arrays may be modified in place but changes
+              are kept in private memory and never written back to the file.
+              Only supported for FITS files.
+
+            Pages are only read when touched so processing a large file one
+            section at a time keeps the resident memory bounded. Arrays that
+            astropy has to convert on read (for example scaled or
+            pseudo-unsigned integer data) are loaded into memory. Views stay
+            valid after `close` for as long as they are referenced, and are
+            promoted to in-memory arrays by `copy` (or ``numpy.copy``).
+
+        lazy_arrays : bool, optional
+            Only used when ``init`` is a FITS file path, or an HDUList
+            opened by `~stdatamodels.jwst.datamodels.open`. If `True`,
+            arrays are only read (and cast to the schema datatype) when
+            their attribute is first accessed, or when the model is
+            validated, copied or saved, and the file stays open until the
+            model is closed. Arrays that were never read can no longer be
+            read once the model is closed. Defaults to `False`, reading
+            all arrays when the model is opened.
+
+        arrays : list of str, optional
+            Only used when ``init`` is a FITS file path or HDUList. If
+            given, only these arrays are read from the file, for example
+            ``arrays=["data", "dq"]``. Names are dot-separated and may be
+            glob patterns, for example ``"slits.*.data"``. The other
+            arrays are left out of the model, so accessing them creates
+            their schema default.
+
+        exclude_arrays : list of str, optional
+            Only used when ``init`` is a FITS file path or HDUList. Names
+            of arrays, as for ``arrays``, that are not read from the file.
+
+        max_workers : int, optional
+            Only used when ``init`` is a FITS file path or HDUList. If
+            given, all arrays are read when the model is opened, even
+            with ``lazy_arrays``, and are converted to their schema
+            datatypes by a pool of this many threads. This speeds up
+            opening products with many extensions, such as
+            ``MultiSlitModel``, when all of their arrays are needed.
+
+        lazy_extra_fits : bool, optional
+            Only used together with ``lazy_arrays``. If `True`, the
+            header cards and extensions not described by the schema are
+            only collected into ``extra_fits`` when it is first accessed
+            (or the model is validated or saved), which skips scanning
+            every header card when opening the file.
+
         **kwargs
             Additional keyword arguments are expected to be array-like attributes of
             the data model. These will be initialized with the given values only if they
@@ -142,12 +277,15 @@ class DataModel(properties.ObjectNode):
         """
         if "memmap" in kwargs:
             warnings.warn(
-                "Memory mapping is no longer supported; memmap is hard-coded to False "
-                "and the keyword argument no longer has any effect.",
+                "The memmap keyword argument is deprecated and no longer has any effect; "
+                "use mmap_mode to memory map arrays.",
                 DeprecationWarning,
                 stacklevel=2,
             )
             kwargs.pop("memmap")
+        # Set by datamodels.open, with what it learned about the HDUList
+        # it passes as init while choosing the model class.
+        open_context = kwargs.pop("_open_context", None)
 
         # Override value of validation parameters if not explicitly set.
         if pass_invalid_values is None:
@@ -161,16 +299,23 @@ class DataModel(properties.ObjectNode):
         self._ignore_missing_extensions = ignore_missing_extensions
         self._validate_on_assignment = validate_on_assignment
         self._validate_arrays = validate_arrays
+        # Assignments made inside batch_update, validated on exit
+        self._batch_updates = None
+        # What passed the last validate, see validate.tree_change
+        self._validated_subtrees = {}
 
         # Load the schema files
         if schema is None:
             if self.schema_url is None:
-                schema = _DEFAULT_SCHEMA
+                self._schema = mschema.merge_property_trees(_DEFAULT_SCHEMA)
             else:
-                # Create an AsdfFile so we can use its resolver for loading schemas
-                schema = asdf_schema.load_schema(self.schema_url, resolve_references=True)
-
-        self._schema = mschema.merge_property_trees(schema)
+                # Resolved and merged schemas are shared by all instances
+                self._schema = mschema.load_merged_schema(self.schema_url)
+        elif isinstance(schema, mschema._FrozenDict):
+            # Schemas from the cache are already merged
+            self._schema = schema
+        else:
+            self._schema = mschema.merge_property_trees(schema)
 
         # Provide the object as context to other classes and functions
         self._parent = None
@@ -183,6 +328,10 @@ class DataModel(properties.ObjectNode):
         # Determine what kind of input we have (init) and execute the
         # proper code to initialize the model
         self._file_references = []
+        # Arrays selected with the arrays and exclude_arrays arguments
+        self._is_selected_array = None
+        # Whether the tree may hold values not read from the file yet
+        self._has_lazy = False
         is_array = False
         is_shape = False
         shape = None
@@ -226,6 +375,9 @@ class DataModel(properties.ObjectNode):
             asdffile = init
 
         elif isinstance(init, fits.HDUList):
+            self._is_selected_array = fits_support._array_selector(arrays, exclude_arrays)
+            lazy_hdulist = open_context is not None and open_context.lazy_arrays
+            self._has_lazy = lazy_hdulist or max_workers is not None
             init = self._migrate_hdulist(init)
             asdffile = fits_support.from_fits(
                 init,
@@ -233,26 +385,49 @@ class DataModel(properties.ObjectNode):
                 self._ctx,
                 ignore_unrecognized_tag=ignore_unrecognized_tag,
                 ignore_missing_extensions=ignore_missing_extensions,
+                lazy_arrays=lazy_hdulist,
+                arrays=arrays,
+                exclude_arrays=exclude_arrays,
+                max_workers=max_workers,
+                lazy_extra_fits=lazy_extra_fits,
+                _open_context=open_context,
             )
 
         elif isinstance(init, (str, PurePath)):
             file_type = filetype.check(init)
 
             if file_type == "fits":
-                with fits.open(init, memmap=False) as hdulist:
-                    hdulist = self._migrate_hdulist(hdulist)
+                self._is_selected_array = fits_support._array_selector(arrays, exclude_arrays)
+                self._has_lazy = lazy_arrays or max_workers is not None
+                hdulist = fits.open(init, **_fits_open_kwargs(mmap_mode))
+                try:
                     asdffile = fits_support.from_fits(
-                        hdulist,
+                        self._migrate_hdulist(hdulist),
                         self._schema,
                         self._ctx,
                         ignore_unrecognized_tag=ignore_unrecognized_tag,
                         ignore_missing_extensions=ignore_missing_extensions,
+                        lazy_arrays=lazy_arrays,
+                        arrays=arrays,
+                        exclude_arrays=exclude_arrays,
+                        max_workers=max_workers,
+                        lazy_extra_fits=lazy_extra_fits,
                     )
+                except Exception:
+                    hdulist.close()
+                    raise
+                if mmap_mode is None and not lazy_arrays:
+                    hdulist.close()
+                else:
+                    # Memory mapped arrays are views of the open file, and
+                    # lazy arrays are read from it, so keep it open until
+                    # the model is closed.
+                    self._file_references.append(_FileReference(hdulist))
 
             elif file_type == "asdf":
                 asdffile = asdf.open(
                     init,
-                    memmap=False,
+                    **_asdf_open_kwargs(mmap_mode),
                     ignore_unrecognized_tag=ignore_unrecognized_tag,
                     ignore_missing_extensions=ignore_missing_extensions,
                 )
@@ -452,6 +627,7 @@ class DataModel(properties.ObjectNode):
             A dictionary to use as a memoization table for deep copy.
         """
         if deepcopy:
+            materialize_lazy(source._instance)
             instance = copy.deepcopy(source._instance, memo=memo)
             target._asdf = AsdfFile()
             # assign to private '_tree' to avoid validation caused
@@ -467,6 +643,7 @@ class DataModel(properties.ObjectNode):
 
         target._shape = source._shape
         target._no_asdf_extension = source._no_asdf_extension
+        target._has_lazy = source._has_lazy and not deepcopy
 
     def copy(self, memo=None):
         """
@@ -488,8 +665,72 @@ class DataModel(properties.ObjectNode):
     __copy__ = __deepcopy__ = copy
 
     def validate(self):
-        """Validate the model instance against its schema."""
-        validate.value_change(str(self), self._instance, self._schema, self)
+        """
+        Validate the model instance against its schema.
+
+        Values that were validated by a previous call and have not been
+        replaced since are not validated again. Objects modified in place
+        (for example changing an attribute of the ``meta.wcs`` object) are
+        not detected as changed.
+        """
+        validate.tree_change(str(self), self._instance, self._schema, self)
+
+    @contextlib.contextmanager
+    def batch_update(self):
+        """
+        Defer validation of attribute assignments until the end of a block.
+
+        With ``validate_on_assignment`` enabled every assignment is validated
+        against the schema as it is made. Inside this context manager
+        assignments are applied immediately and validated together on exit,
+        validating each modified object once instead of once per attribute::
+
+            with model.batch_update():
+                model.meta.wcsinfo.crval1 = 5.3
+                model.meta.wcsinfo.crval2 = -72.1
+
+        Invalid values are handled as they would have been when assigned:
+        they are restored to their previous value (unless
+        ``pass_invalid_values`` is set) and reported with a
+        `~stdatamodels.exceptions.ValidationWarning`, or a
+        `~asdf.exceptions.ValidationError` listing all of them if
+        ``strict_validation`` is set. Until the block exits, reads return
+        the assigned values whether or not they are valid. If the block
+        raises an exception, invalid values are still restored but are
+        only reported with warnings, and the exception propagates.
+
+        Nested blocks are validated when the outermost block exits.
+
+        Yields
+        ------
+        DataModel
+            This model.
+
+        Raises
+        ------
+        ValidationError
+            If ``strict_validation`` is set and an assigned value is invalid.
+        """
+        if self._batch_updates is not None:
+            yield self
+            return
+
+        self._batch_updates = {}
+        try:
+            yield self
+        except BaseException:
+            # Invalid values are still restored, but only reported as
+            # warnings so the exception from the block is not replaced
+            updates, self._batch_updates = self._batch_updates, None
+            for errmsg, _ in properties._validate_batch(updates, self):
+                warnings.warn(errmsg, ValidationWarning, stacklevel=3)
+            raise
+        updates, self._batch_updates = self._batch_updates, None
+        errors = properties._validate_batch(updates, self)
+        if errors and self._strict_validation:
+            raise ValidationError("\n".join(errmsg for errmsg, _ in errors)) from errors[0][1]
+        for errmsg, _ in errors:
+            warnings.warn(errmsg, ValidationWarning, stacklevel=3)
 
     @functools.wraps(asdf.AsdfFile.add_history_entry)
     def add_history_entry(self, *args, **kwargs):  # noqa: D102
@@ -497,10 +738,12 @@ class DataModel(properties.ObjectNode):
 
     @functools.wraps(asdf.AsdfFile.info)
     def info(self, *args, **kwargs):  # noqa: D102
+        materialize_lazy(self._instance)
         return self._asdf.info(**kwargs)
 
     @functools.wraps(asdf.AsdfFile.search)
     def search(self, *args, **kwargs):  # noqa: D102
+        materialize_lazy(self._instance)
         return self._asdf.search(*args, **kwargs)
 
     try:
@@ -543,11 +786,9 @@ class DataModel(properties.ObjectNode):
         if isinstance(init, str):
             self.meta.filename = Path(init).name
         elif isinstance(init, fits.HDUList):
-            info = init.fileinfo(0)
-            if info is not None:
-                filename = info.get("filename")
-                if filename is not None:
-                    self.meta.filename = Path(filename).name
+            filename = init.filename()
+            if filename is not None:
+                self.meta.filename = Path(filename).name
 
         # store the data model type, if not already set
         klass = self.__class__.__name__
@@ -733,6 +974,75 @@ class DataModel(properties.ObjectNode):
                     del hdulist["ASDF"]
             hdulist.writeto(init, *args, **kwargs)
 
+    def to_fits_stream(self, init, arrays, overwrite=False):
+        """
+        Write a data model to a FITS file, filling large arrays in chunks.
+
+        The headers, the ASDF tree and the arrays of the model are
+        written as in `to_fits`, except for the arrays named in
+        ``arrays``, which are written in chunks with the returned
+        writer. This keeps memory use bounded by the chunk size for
+        products larger than memory. The metadata must be complete
+        when this is called; later changes to the model are not written.
+
+        Parameters
+        ----------
+        init : str or pathlib.Path
+            The file to write to.
+        arrays : dict
+            Mapping of the names of the streamed arrays to their shapes.
+            The arrays must be top-level attributes with a ``datatype``
+            in the schema.
+        overwrite : bool, optional
+            If True, overwrite ``init`` if it exists.
+
+        Returns
+        -------
+        stdatamodels.fits_support.FitsStreamWriter
+            The writer. Use it as a context manager or call its
+            ``close`` method to complete the file.
+
+        Examples
+        --------
+        Write the ramp one integration at a time:
+
+        >>> shape = (nints, ngroups, ny, nx)  # doctest: +SKIP
+        >>> with model.to_fits_stream("ramp.fits", {"data": shape}) as stream:  # doctest: +SKIP
+        ...     for i in range(nints):
+        ...         stream.write("data", i, process(i))
+        """
+        self.on_save(init)
+
+        placeholders = {}
+        for name, shape in arrays.items():
+            datatype = properties._get_schema_for_property(self._schema, name).get("datatype")
+            if not isinstance(datatype, str):
+                raise ValueError(  # noqa: TRY004
+                    f"Cannot stream {name!r}: the schema defines no array datatype"
+                )
+            dtype = ndarray.asdf_datatype_to_numpy_dtype(datatype)
+            placeholders[name] = fits_support.stream_placeholder(shape, dtype)
+
+        previous = {name: self._instance.get(name) for name in arrays}
+        try:
+            for name, placeholder in placeholders.items():
+                setattr(self, name, placeholder)
+            # Pick up the arrays again in case they were cast on assignment
+            placeholders = {name: self._instance[name] for name in arrays}
+            hdulist = fits_support.to_fits(self._instance, self._schema)
+        finally:
+            for name, value in previous.items():
+                if value is None:
+                    self._instance.pop(name, None)
+                else:
+                    self._instance[name] = value
+
+        if self._no_asdf_extension and "ASDF" in hdulist:
+            del hdulist["ASDF"]
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="Card is too long")
+            return fits_support.FitsStreamWriter(init, hdulist, placeholders, overwrite=overwrite)
+
     @property
     def shape(self):
         """Return the shape of the primary array."""
@@ -883,6 +1193,26 @@ class DataModel(properties.ObjectNode):
 
             ("meta.observation.date": "2012-04-22T03:22:05.432")
         """
+        yield from self._flat_items()
+
+    def _flat_items(self, load_arrays=True):
+        """
+        Iterate over the flattened datamodel contents.
+
+        Parameters
+        ----------
+        load_arrays : bool, optional
+            If `False`, arrays that have not been read yet are yielded
+            as placeholders instead of being read.
+
+        Yields
+        ------
+        tuple
+            The dot-separated name and value of each item.
+        """
+        for node, key, placeholder in _find_lazy(self._instance):
+            if load_arrays or not isinstance(placeholder, _LazyArray):
+                _load_lazy(node, key, placeholder)
 
         def recurse(tree, path=None):
             if path is None:
@@ -1044,6 +1374,10 @@ class DataModel(properties.ObjectNode):
 
         # Update from extra_fits as well, if indicated
         if extra_fits:
+            # extra_fits may not have been collected from the file yet
+            for tree in (self._instance, d):
+                if isinstance(tree.get("extra_fits"), _Lazy):
+                    _load_lazy(tree, "extra_fits", tree["extra_fits"])
             for hdu_name in hdu_names:
                 path = ["extra_fits", hdu_name, "header"]
                 set_hdu_keyword(self._instance, d, path)
@@ -1084,8 +1418,8 @@ class DataModel(properties.ObjectNode):
         else:
             return {
                 key: convert_val(val)
-                for (key, val) in self.items()
-                if not isinstance(val, (np.ndarray, NDArrayType))
+                for (key, val) in self._flat_items(load_arrays=False)
+                if not isinstance(val, (np.ndarray, NDArrayType, _LazyArray))
             }
 
     @property
@@ -1241,10 +1575,82 @@ class DataModel(properties.ObjectNode):
         AttributeError
             If the attribute does not exist.
         """
-        if attribute in self.instance:
+        if attribute in self._instance:
             return getattr(self, attribute)
         raise AttributeError(f'{self} has no attribute "{attribute}"')
 
+    def read_section(self, attribute, key):
+        """
+        Read part of an array without loading the whole array.
+
+        For models opened with ``lazy_arrays=True``, arrays in FITS image
+        extensions that have not been accessed yet are read through
+        `astropy.io.fits.ImageHDU.section`, so only the requested part
+        is read from the file. Other arrays are
+        sliced, which for arrays opened with ``mmap_mode`` only reads
+        the pages that hold the requested part.
+
+        Parameters
+        ----------
+        attribute : str
+            The dot-separated name of the array, for example ``"data"``
+            or ``"slits.0.data"``.
+        key : int, slice or tuple
+            The numpy index of the part to read, for example
+            ``numpy.s_[0]`` for the first integration of a ramp, or
+            ``numpy.s_[0, :, 100:200]`` for rows 100 to 199 of it.
+
+        Returns
+        -------
+        numpy.ndarray
+            The requested part of the array. It does not share memory
+            with the model unless the array was already loaded.
+
+        Examples
+        --------
+        Process a ramp one integration at a time::
+
+            with RampModel("ramp.fits", lazy_arrays=True) as model:
+                for integration in range(model.meta.exposure.nints):
+                    data = model.read_section("data", integration)
+        """
+        *parents, name = attribute.split(".")
+        node = self
+        for part in parents:
+            node = node[int(part)] if part.isdigit() else getattr(node, part)
+
+        if name.isdigit():
+            name = int(name)
+        try:
+            value = node._instance[name]
+        except (KeyError, IndexError, TypeError):
+            value = None
+        if isinstance(value, _LazyArray):
+            return value._read_section(key)
+
+        array = node[name] if isinstance(name, int) else getattr(node, name)
+        return array[key]
+
+    def _init_array(self, attribute):
+        """
+        Initialize an array attribute if it is missing and cast it to its schema.
+
+        Arrays that have not been read from their file yet are left
+        alone as they are cast when first accessed, and arrays that
+        were not selected when reading the file are not created.
+
+        Parameters
+        ----------
+        attribute : str
+            The array attribute to initialize.
+        """
+        if attribute not in self._instance:
+            if self._is_selected_array is not None and not self._is_selected_array([attribute]):
+                return
+        elif isinstance(self._instance[attribute], _LazyArray):
+            return
+        setattr(self, attribute, getattr(self, attribute))
+
 
 class _FileReference:
     """
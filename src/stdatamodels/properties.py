@@ -4,6 +4,7 @@ import copy
 from collections.abc import Mapping
 
 import numpy as np
+from asdf.exceptions import ValidationError
 from asdf.tags.core import ndarray
 from astropy.io import fits
 
@@ -12,6 +13,9 @@ from . import util, validate
 
 __all__ = ["ListNode", "ObjectNode"]
 
+# Marks attributes that were missing before a batched assignment
+_MISSING = object()
+
 
 def _is_struct_array(val):
     return (
@@ -36,7 +40,7 @@ def _cast(val, schema):
 
     if "datatype" in schema:
         # Handle lazy array
-        if isinstance(val, ndarray.NDArrayType):
+        if isinstance(val, (ndarray.NDArrayType, util._LazyArray)):
             val = val._make_array()
 
         allow_extra_columns = False
@@ -304,6 +308,42 @@ def _unmake_node(obj):
 
 
 def _get_schema_for_property(schema, attr):
+    """
+    Find the subschema for a property, searching through combiners.
+
+    Lookups in read-only (cached) schemas are memoized per schema, so
+    repeated attribute access only searches each schema once per attribute.
+
+    Parameters
+    ----------
+    schema : dict
+        The schema to search.
+    attr : str
+        The property name.
+
+    Returns
+    -------
+    dict
+        The subschema for the property, or an empty dict if the
+        property is not defined by the schema.
+    """
+    if type(schema) is not mschema._FrozenDict:
+        return _search_schema_for_property(schema, attr)
+    try:
+        return schema._property_schemas[attr]
+    except AttributeError:
+        schema._property_schemas = {}
+    except KeyError:
+        pass
+    subschema = _search_schema_for_property(schema, attr)
+    if subschema == {}:
+        # don't hand out a shared modifiable dict
+        subschema = mschema._FrozenDict()
+    schema._property_schemas[attr] = subschema
+    return subschema
+
+
+def _search_schema_for_property(schema, attr):
     subschema = schema.get("properties", {}).get(attr, None)
     if subschema is not None:
         return subschema
@@ -335,21 +375,75 @@ def _find_property(schema, attr):
     return find
 
 
+def _validate_batch(updates, ctx):
+    """
+    Validate the attributes assigned during a `DataModel.batch_update`.
+
+    Each object with several assigned attributes is first validated as a
+    whole. Only when that fails, or the object holds arrays that have not
+    been read yet, are the attributes validated one by one. Invalid values
+    are restored to their previous value, unless ``ctx`` passes invalid
+    values (and is not strict).
+
+    Parameters
+    ----------
+    updates : dict
+        Maps the id of each modified object to the ``(node, originals)``
+        of the node it was modified through and the previous value of
+        each assigned attribute.
+    ctx : DataModel
+        The datamodel the attributes were assigned on.
+
+    Returns
+    -------
+    list of tuple
+        The ``(message, error)`` of each invalid attribute.
+    """
+    errors = []
+    for node, originals in updates.values():
+        instance = node._instance
+        if len(originals) > 1 and node is not ctx and not util._find_lazy(instance):
+            try:
+                validate._check_value(instance, node._schema, ctx)
+                continue
+            except ValidationError:
+                pass
+
+        for attr, original in originals.items():
+            if attr not in instance:
+                # deleted after it was assigned
+                continue
+            schema = _get_schema_for_property(node._schema, attr)
+            try:
+                validate._check_value(instance[attr], schema, ctx)
+            except ValidationError as error:
+                errors.append((validate._error_message(attr, error), error))
+                if ctx._strict_validation or not ctx._pass_invalid_values:
+                    if original is _MISSING:
+                        del instance[attr]
+                    else:
+                        instance[attr] = original
+    return errors
+
+
 class Node:
     """An object that supports validation against a schema."""
 
     def __init__(self, attr, instance, schema, ctx, parent):
-        self._name = attr
-        self._instance = instance
-        self._schema = schema
-        self._ctx = ctx
-        self._parent = parent
+        # Nodes are created on every attribute access, so bypass
+        # ObjectNode.__setattr__ for the private attributes
+        self.__dict__.update(
+            _name=attr, _instance=instance, _schema=schema, _ctx=ctx, _parent=parent
+        )
 
     def _validate(self):
         return validate.value_change(self._name, self._instance, self._schema, self._ctx)
 
     @property
     def instance(self):
+        if self._ctx._has_lazy:
+            # placeholders of values that were not read yet are internal
+            util.materialize_lazy(self._instance)
         return self._instance
 
 
@@ -370,16 +464,37 @@ class ObjectNode(Node):
         if attr.startswith("_"):
             raise AttributeError(f"No attribute {attr}")
 
-        schema = _get_schema_for_property(self._schema, attr)
         try:
             val = self._instance[attr]
         except KeyError as err:
+            schema = _get_schema_for_property(self._schema, attr)
             if schema == {}:
                 raise AttributeError(f"No attribute '{attr}'") from err
 
             val = _make_default(attr, schema, self._ctx)
             if val is not None:
                 self._instance[attr] = val
+        else:
+            if not isinstance(val, (dict, list, util._Lazy)):
+                # scalars and arrays don't need the schema
+                return val
+            schema = _get_schema_for_property(self._schema, attr)
+
+        if isinstance(val, util._LazyArray):
+            # Read the array on first access, rejecting it like an
+            # eagerly loaded array would have been if it is invalid
+            val = val._make_array()
+            if self._ctx._validate_on_assignment and not validate.value_change(
+                attr, val, schema, self._ctx
+            ):
+                del self._instance[attr]
+                return getattr(self, attr)
+            self._instance[attr] = val
+        elif isinstance(val, util._Lazy):
+            # Other values (extra_fits) are not validated, as when read eagerly
+            if util._load_lazy(self._instance, attr, val) is None:
+                return getattr(self, attr)
+            val = self._instance[attr]
 
         if isinstance(val, dict):
             node = ObjectNode(attr, val, schema, self._ctx, self)
@@ -399,8 +514,15 @@ class ObjectNode(Node):
                 val = _make_default(attr, schema, self._ctx)
             val = _cast(val, schema)
 
-            node = ObjectNode(attr, val, schema, self._ctx, self)
             if self._ctx._validate_on_assignment:
+                batch = self._ctx._batch_updates
+                if batch is not None:
+                    # inside DataModel.batch_update, validated on exit
+                    _, originals = batch.setdefault(id(self._instance), (self, {}))
+                    originals.setdefault(attr, self._instance.get(attr, _MISSING))
+                    self._instance[attr] = val
+                    return
+                node = ObjectNode(attr, val, schema, self._ctx, self)
                 if node._validate():
                     self._instance[attr] = val
             else:
@@ -460,7 +582,10 @@ class ListNode(Node):
 
     def __getitem__(self, i):
         schema = _get_schema_for_index(self._schema, i)
-        return _make_node(self._name, self._instance[i], schema, self._ctx, self)
+        val = self._instance[i]
+        if isinstance(val, util._LazyArray):
+            val = self._instance[i] = val._make_array()
+        return _make_node(self._name, val, schema, self._ctx, self)
 
     def __setitem__(self, i, val):
         schema = _get_schema_for_index(self._schema, i)
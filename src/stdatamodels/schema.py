@@ -1,3 +1,14 @@
+import copy
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import asdf
+from asdf import schema as asdf_schema
+
+from . import _version
+
+
 # return_result included for backward compatibility
 def find_fits_keyword(schema, keyword, return_result=False):
     """
@@ -226,3 +237,192 @@ def merge_property_trees(schema):
     walk_schema(schema, callback)
 
     return combined_items | top_items
+
+
+class _FrozenDict(dict):
+    """
+    A read-only dict used for schemas shared through the schema cache.
+
+    Reads are plain `dict` reads. `copy.deepcopy` returns a mutable copy
+    made of plain dicts and lists. As the contents can not change, results
+    derived from the schema are memoized on the schema itself: property
+    lookups (see `stdatamodels.properties`) in ``_property_schemas``,
+    validators (see `stdatamodels.validate`) in ``_validators`` and
+    ``_scalar_validator``, and FITS reading and writing plans (see
+    `stdatamodels.fits_support`) in ``_compiled``.
+    """
+
+    __slots__ = ("_property_schemas", "_validators", "_scalar_validator", "_compiled")
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Cached schemas are read-only, use copy.deepcopy to get a modifiable copy")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        result = memo[id(self)] = {}
+        for key, val in self.items():
+            result[key] = copy.deepcopy(val, memo)
+        return result
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class _FrozenList(list):
+    """A read-only list used for schemas shared through the schema cache."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Cached schemas are read-only, use copy.deepcopy to get a modifiable copy")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = clear = extend = insert = pop = remove = reverse = sort = _readonly
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        result = memo[id(self)] = []
+        for val in self:
+            result.append(copy.deepcopy(val, memo))
+        return result
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+def _freeze(node, memo):
+    if id(node) in memo:
+        return memo[id(node)]
+    if isinstance(node, dict):
+        frozen = memo[id(node)] = _FrozenDict()
+        dict.update(frozen, {key: _freeze(val, memo) for key, val in node.items()})
+    elif isinstance(node, list):
+        frozen = memo[id(node)] = _FrozenList()
+        list.extend(frozen, [_freeze(val, memo) for val in node])
+    else:
+        frozen = node
+    return frozen
+
+
+SchemaCacheInfo = namedtuple(
+    "SchemaCacheInfo", ["hits", "misses", "maxsize", "currsize", "build_time"]
+)
+
+
+class _SchemaCache:
+    """
+    LRU cache of resolved and merged schemas shared by all models.
+
+    Entries are keyed on the schema URL, the builder used to create the
+    schema and the asdf and stdatamodels versions.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._build_time = 0.0
+
+    def get(self, url, builder=None):
+        key = (url, builder, asdf.__version__, _version.version)
+        with self._lock:
+            if key in self._entries:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self._misses += 1
+
+            start = time.perf_counter()
+            if builder is None:
+                schema = asdf_schema.load_schema(url, resolve_references=True)
+            else:
+                schema = builder()
+            schema = _freeze(merge_property_trees(schema), {})
+            self._build_time += time.perf_counter() - start
+
+            self._entries[key] = schema
+            if self.maxsize is not None and len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return schema
+
+    def clear(self, url=None):
+        with self._lock:
+            if url is None:
+                self._entries.clear()
+                self._hits = self._misses = 0
+                self._build_time = 0.0
+            else:
+                for key in [key for key in self._entries if key[0] == url]:
+                    del self._entries[key]
+
+    def info(self):
+        with self._lock:
+            return SchemaCacheInfo(
+                self._hits, self._misses, self.maxsize, len(self._entries), self._build_time
+            )
+
+
+_schema_cache = _SchemaCache(maxsize=256)
+
+
+def load_merged_schema(url, builder=None):
+    """
+    Load, resolve and merge a schema, reusing a process-wide cache.
+
+    The returned schema is shared by every caller and is read-only,
+    use `copy.deepcopy` to get a copy that can be modified.
+
+    Parameters
+    ----------
+    url : str
+        The schema URL.
+    builder : callable, optional
+        A function that takes no arguments and returns the (unmerged)
+        schema for ``url``. Used for schemas that are modified after
+        loading. Must be hashable and stable across calls, for example
+        a function or a classmethod. Defaults to loading ``url``
+        with references resolved.
+
+    Returns
+    -------
+    dict
+        The merged schema.
+    """
+    return _schema_cache.get(url, builder=builder)
+
+
+def clear_schema_cache(url=None):
+    """
+    Invalidate cached schemas.
+
+    This should be called after the asdf resources a schema
+    depends on have changed (for example a new resource mapping
+    replacing an existing schema).
+
+    Parameters
+    ----------
+    url : str, optional
+        Only remove the entries for this schema URL. By default all
+        entries are removed and the statistics are reset.
+    """
+    _schema_cache.clear(url=url)
+
+
+def schema_cache_info():
+    """
+    Report schema cache statistics.
+
+    Returns
+    -------
+    SchemaCacheInfo
+        Named tuple of ``hits``, ``misses``, ``maxsize``, ``currsize`` and
+        ``build_time`` (total seconds spent building schemas).
+    """
+    return _schema_cache.info()
@@ -342,6 +342,149 @@ def convert_fitsrec_to_array_in_tree(tree):
     return treeutil.walk_and_modify(tree, _convert_fitsrec)
 
 
+class _Lazy:
+    """
+    Placeholder for a value that is read from its file on first access.
+
+    Parameters
+    ----------
+    loader : callable
+        Function that reads and returns the value, or `None` if there
+        is no value, in which case the placeholder is removed.
+    *args : tuple
+        Arguments passed to ``loader``.
+    """
+
+    __slots__ = ("_loader", "_args")
+
+    def __init__(self, loader, *args):
+        self._loader = loader
+        self._args = args
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self._loader.__name__}{self._args!r}>"
+
+    def _load(self):
+        return self._loader(*self._args)
+
+
+class _LazyArray(_Lazy):
+    """
+    Placeholder for an array that is read from its file on first access.
+
+    Parameters
+    ----------
+    loader : callable
+        Function that reads and returns the array.
+    *args : tuple
+        Arguments passed to ``loader``.
+    section_loader : callable, optional
+        Function that reads and returns part of the array, called with
+        the index of the part followed by ``args``. If not given, parts
+        are read by reading the whole array.
+    """
+
+    __slots__ = ("_section_loader",)
+
+    def __init__(self, loader, *args, section_loader=None):
+        super().__init__(loader, *args)
+        self._section_loader = section_loader
+
+    def _make_array(self):
+        return self._load()
+
+    def _read_section(self, key):
+        if self._section_loader is None:
+            return self._make_array()[key]
+        return self._section_loader(key, *self._args)
+
+
+def _find_lazy(tree, placeholder_type=_Lazy):
+    """
+    Find the lazy placeholders in a tree.
+
+    Parameters
+    ----------
+    tree : object
+        A tree that may contain lazy placeholders.
+    placeholder_type : type, optional
+        Only find placeholders of this type, for example `_LazyArray`.
+
+    Returns
+    -------
+    list of tuple
+        The ``(container, key, placeholder)`` of each placeholder, in a
+        fixed order for a given tree.
+    """
+    placeholders = []
+    # track visited containers since trees may be recursive
+    seen = set()
+    nodes = [tree]
+    while nodes:
+        node = nodes.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if isinstance(node, dict):
+            keys = list(node)
+        elif isinstance(node, list):
+            keys = range(len(node))
+        else:
+            continue
+        for key in keys:
+            value = node[key]
+            if isinstance(value, placeholder_type):
+                placeholders.append((node, key, value))
+            elif isinstance(value, (dict, list)):
+                nodes.append(value)
+    return placeholders
+
+
+def _load_lazy(node, key, placeholder):
+    """
+    Replace a lazy placeholder in a tree with its value.
+
+    Parameters
+    ----------
+    node : dict or list
+        The container of the placeholder.
+    key : str or int
+        The key of the placeholder in ``node``.
+    placeholder : _Lazy
+        The placeholder.
+
+    Returns
+    -------
+    object
+        The value, `None` if there is none and the key was removed.
+    """
+    value = placeholder._load()
+    if value is None and isinstance(node, dict):
+        del node[key]
+    else:
+        node[key] = value
+    return value
+
+
+def materialize_lazy(tree):
+    """
+    Replace, in place, all lazy placeholders in a tree with their values.
+
+    Parameters
+    ----------
+    tree : object
+        A tree that may contain lazy placeholders.
+
+    Returns
+    -------
+    object
+        The input tree.
+    """
+    for node, key, placeholder in _find_lazy(tree):
+        _load_lazy(node, key, placeholder)
+    return tree
+
+
 def _rebuild_fits_rec_dtype(fits_rec):
     dtype = fits_rec.dtype
     new_dtype = []
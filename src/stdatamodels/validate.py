@@ -1,18 +1,28 @@
 """Functions that support validation of model changes."""
 
+import re
+import threading
 import warnings
+import weakref
 
+import asdf
 import numpy as np
+from asdf import constants as asdf_constants
 from asdf import schema as asdf_schema
-from asdf import yamlutil
+from asdf import treeutil, versioning, yamlutil
 from asdf.exceptions import ValidationError
 from asdf.schema import YAML_VALIDATORS
-from asdf.tags.core import ndarray
+from asdf.tags.core import AsdfObject, ndarray
 from asdf.util import HashableDict
 
+from stdatamodels import schema as mschema
 from stdatamodels.exceptions import ValidationWarning
 
-from .util import convert_fitsrec_to_array_in_tree, remove_none_from_tree
+from .util import (
+    convert_fitsrec_to_array_in_tree,
+    materialize_lazy,
+    remove_none_from_tree,
+)
 
 # always show validation warnings unless another filter was added that
 # matches these warnings (by passing append=True)
@@ -44,17 +54,211 @@ def value_change(path, value, schema, ctx):
         update = True
 
     except ValidationError as error:
-        update = False
-        errmsg = _error_message(path, error)
-        if ctx._pass_invalid_values:
-            update = True
-        if ctx._strict_validation:
-            raise ValidationError(errmsg) from error
-        else:
-            warnings.warn(errmsg, ValidationWarning, stacklevel=2)
+        update = _report_error(path, error, ctx)
     return update
 
 
+def tree_change(path, tree, schema, ctx):
+    """
+    Validate a model's tree like `value_change`, skipping unchanged parts.
+
+    The parts of the tree that are unchanged since the last time it
+    passed validation are not converted to a tagged tree or validated
+    again (see `_prune_validated`).
+
+    Parameters
+    ----------
+    path : str or list
+        The path to the tree, used in error messages.
+    tree : dict
+        The tree to validate, usually ``ctx._instance``.
+    schema : dict
+        The schema to validate against.
+    ctx : DataModel
+        The datamodel that holds the tree.
+
+    Returns
+    -------
+    bool
+        True if the tree is valid, False if it is invalid.
+    """
+    # Arrays are read before deciding what changed, as validating
+    # the full tree would have read them
+    materialize_lazy(tree)
+    validated = {}
+    pruned = _prune_validated(
+        tree, schema, (), ctx._validated_subtrees, validated, ctx._validate_arrays
+    )
+    try:
+        _check_value(pruned, schema, ctx)
+    except ValidationError as error:
+        return _report_error(path, error, ctx)
+    ctx._validated_subtrees = validated
+    return True
+
+
+def _report_error(path, error, ctx):
+    """
+    Raise or warn about a validation error, depending on the ctx settings.
+
+    Parameters
+    ----------
+    path : str or list
+        The path to the attribute that was being validated.
+    error : ValidationError
+        The validation error.
+    ctx : DataModel
+        The datamodel the attribute belongs to.
+
+    Returns
+    -------
+    bool
+        True if the invalid value should be used anyway.
+    """
+    errmsg = _error_message(path, error)
+    if ctx._strict_validation:
+        raise ValidationError(errmsg) from error
+    warnings.warn(errmsg, ValidationWarning, stacklevel=3)
+    return bool(ctx._pass_invalid_values)
+
+
+# Schema keywords that look at an object as a whole, objects with any of
+# these can't be validated by validating each of their properties
+_WHOLE_OBJECT_KEYWORDS = frozenset(
+    [
+        "$ref",
+        "additionalProperties",
+        "allOf",
+        "anyOf",
+        "const",
+        "dependencies",
+        "else",
+        "enum",
+        "if",
+        "maxProperties",
+        "minProperties",
+        "not",
+        "oneOf",
+        "patternProperties",
+        "propertyNames",
+        "tag",
+        "then",
+    ]
+)
+
+# Values that can be kept to compare with, other values are
+# referenced weakly so that keeping them does not keep them alive
+_IMMUTABLE_TYPES = (str, bytes, int, float, complex, bool, type(None), np.generic)
+
+
+def _prune_validated(node, schema, path, cache, validated, validate_arrays, ancestors=None):
+    """
+    Copy the objects in a tree leaving out values that were validated before.
+
+    Each object (dict) whose schema only constrains its properties one by
+    one is copied without the values that are the same objects that
+    passed validation at the same path last time, according to the
+    snapshots in ``cache``. Other values (lists, objects with schemas that
+    constrain them as a whole, values that can't be weakly referenced)
+    are always kept. Validating the copy is then the same as validating
+    the whole tree, assuming validated objects (other than the shape and
+    dtype of arrays) were not modified in place.
+
+    Parameters
+    ----------
+    node : object
+        The (sub)tree.
+    schema : dict or None
+        The schema for ``node``.
+    path : tuple
+        The path to ``node`` in the tree.
+    cache : dict
+        Maps paths of objects to the ``(schema, validate_arrays, snapshot)``
+        of their previous successful validation, where ``snapshot`` maps
+        keys to the value, or to a weak reference to the value and, for
+        arrays, their shape and dtype.
+    validated : dict
+        Filled with the entries to use as ``cache`` once the copy is valid.
+    validate_arrays : bool
+        Whether array validators are used, the cache is only used
+        if this matches.
+    ancestors : set, optional
+        The ids of the objects containing ``node``, recursive
+        trees are kept whole where they recurse.
+
+    Returns
+    -------
+    object or None
+        The copy of ``node``, ``node`` if it can't be copied by
+        parts, or `None` if all of ``node`` was validated before.
+    """
+    if ancestors is None:
+        ancestors = set()
+    if type(node) not in (dict, AsdfObject) or id(node) in ancestors:
+        return node
+    if schema is None:
+        schema = {}
+    elif type(schema) is not mschema._FrozenDict:
+        return node
+    if schema.get("type", "object") != "object" or not _WHOLE_OBJECT_KEYWORDS.isdisjoint(schema):
+        return node
+
+    entry = cache.get(path)
+    if entry is not None and entry[0] is schema and entry[1] == validate_arrays:
+        previous = entry[2]
+    else:
+        previous = {}
+    snapshot = {}
+    validated[path] = (schema, validate_arrays, snapshot)
+
+    properties = schema.get("properties", {})
+    required = schema.get("required", ())
+    pruned = type(node)()
+    ancestors.add(id(node))
+    for key, value in node.items():
+        if isinstance(value, dict):
+            subtree = _prune_validated(
+                value,
+                properties.get(key),
+                path + (key,),
+                cache,
+                validated,
+                validate_arrays,
+                ancestors,
+            )
+            if subtree is not None:
+                pruned[key] = subtree
+            elif key in required:
+                pruned[key] = value
+            continue
+
+        if isinstance(value, _IMMUTABLE_TYPES):
+            snapshot[key] = value
+            unchanged = previous.get(key, _NOT_VALIDATED) is value
+        else:
+            try:
+                ref = weakref.ref(value)
+            except TypeError:
+                # lists and others that can't be tracked
+                pruned[key] = value
+                continue
+            # arrays can be reshaped or cast in place
+            state = (value.shape, value.dtype) if isinstance(value, np.ndarray) else None
+            snapshot[key] = (ref, state)
+            last = previous.get(key)
+            unchanged = isinstance(last, tuple) and last[0]() is value and last[1] == state
+        if not unchanged or key in required:
+            pruned[key] = value
+    ancestors.discard(id(node))
+
+    if not pruned and path and not required:
+        return None
+    return pruned
+
+
+_NOT_VALIDATED = object()
+
+
 def _validate_datatype(validator, schema_datatype, instance, schema):
     """
     Validate a datatype instance against a schema.
@@ -173,6 +377,135 @@ _VALIDATORS["ndim"] = ndarray.validate_ndim
 _VALIDATORS["max_ndim"] = ndarray.validate_max_ndim
 
 
+# The keywords checked by scalar validators, schemas with other
+# validation keywords always use the full validator
+_SCALAR_KEYWORDS = frozenset(
+    [
+        "enum",
+        "exclusiveMaximum",
+        "exclusiveMinimum",
+        "maxLength",
+        "maximum",
+        "minLength",
+        "minimum",
+        "pattern",
+        "type",
+    ]
+)
+_VALIDATION_KEYWORDS = frozenset(_VALIDATORS) | _SCALAR_KEYWORDS
+
+# Python types of the values scalar validators accept for each schema type
+_SCALAR_TYPES = {
+    "boolean": (bool,),
+    "integer": (int,),
+    "number": (int, float),
+    "string": (str,),
+}
+
+
+def _compile_scalar_validator(schema):
+    """
+    Compile a leaf schema into a function that checks scalar values.
+
+    The function checks ``str``, ``int``, ``float`` and ``bool`` values
+    against the ``type``, ``enum``, ``minimum``, ``maximum``, ``pattern``,
+    ``minLength`` and ``maxLength`` keywords (with the JSON schema draft 4
+    meaning used by asdf) in Python. It only answers whether a value is
+    certainly valid. Values it can't accept (other types, ``enum`` values
+    that aren't strings, invalid values) are left to the full validator,
+    which also produces the error message.
+
+    Parameters
+    ----------
+    schema : dict
+        The schema to compile.
+
+    Returns
+    -------
+    callable or None
+        Function that takes a value and returns `True` if the value is
+        valid, or `None` if the schema uses other validation keywords.
+    """
+    if not _SCALAR_KEYWORDS.issuperset(_VALIDATION_KEYWORDS.intersection(schema)):
+        return None
+
+    schema_types = schema.get("type", list(_SCALAR_TYPES))
+    if isinstance(schema_types, str):
+        schema_types = [schema_types]
+    allowed_types = frozenset(t for name in schema_types for t in _SCALAR_TYPES.get(name, ()))
+    if not allowed_types:
+        return None
+
+    checks = []
+    if "enum" in schema:
+        strings = frozenset(item for item in schema["enum"] if type(item) is str)
+        checks.append(lambda value: type(value) is str and value in strings)
+    if "minimum" in schema:
+        minimum = schema["minimum"]
+        if schema.get("exclusiveMinimum", False):
+            checks.append(lambda value: type(value) not in (int, float) or value > minimum)
+        else:
+            checks.append(lambda value: type(value) not in (int, float) or value >= minimum)
+    if "maximum" in schema:
+        maximum = schema["maximum"]
+        if schema.get("exclusiveMaximum", False):
+            checks.append(lambda value: type(value) not in (int, float) or value < maximum)
+        else:
+            checks.append(lambda value: type(value) not in (int, float) or value <= maximum)
+    if "pattern" in schema:
+        regex = re.compile(schema["pattern"])
+        checks.append(lambda value: type(value) is not str or regex.search(value) is not None)
+    if "minLength" in schema:
+        min_length = schema["minLength"]
+        checks.append(lambda value: type(value) is not str or len(value) >= min_length)
+    if "maxLength" in schema:
+        max_length = schema["maxLength"]
+        checks.append(lambda value: type(value) is not str or len(value) <= max_length)
+
+    def validate_scalar(value):
+        value_type = type(value)
+        if value_type not in allowed_types:
+            return False
+        # asdf rejects integers that don't fit in 64 bits
+        if value_type is int and not (
+            asdf_constants.MIN_NUMBER <= value <= asdf_constants.MAX_NUMBER
+        ):
+            return False
+        for check in checks:
+            if not check(value):
+                return False
+        return True
+
+    return validate_scalar
+
+
+def _get_scalar_validator(schema):
+    """
+    Get the scalar validator for a cached schema.
+
+    The validator is compiled once and kept on the schema
+    (in ``_scalar_validator``).
+
+    Parameters
+    ----------
+    schema : dict
+        The schema.
+
+    Returns
+    -------
+    callable or None
+        The function returned by `_compile_scalar_validator`, or
+        `None` if ``schema`` is not a cached schema.
+    """
+    if type(schema) is not mschema._FrozenDict:
+        return None
+    try:
+        return schema._scalar_validator
+    except AttributeError:
+        scalar_validator = schema._scalar_validator = _compile_scalar_validator(schema)
+        return scalar_validator
+
+
 def _check_value(value, schema, ctx):
     """
     Perform the actual validation.
@@ -189,6 +522,11 @@ def _check_value(value, schema, ctx):
     # Do not validate None values.  These are regarded as missing in DataModel,
     # and will eventually be stripped out when the model is saved to FITS or ASDF.
     if value is not None:
+        scalar_validator = _get_scalar_validator(schema)
+        if scalar_validator is not None and scalar_validator(value):
+            return
+        # Arrays that have not been read yet must be read to be validated.
+        materialize_lazy(value)
         # There may also be Nones hiding within the value.  Do this before
         # converting to tagged tree, so that we don't have to descend unnecessarily
         # into nodes for custom types.
@@ -199,12 +537,101 @@ def _check_value(value, schema, ctx):
         with ctx._asdf._blocks.write_context(None):
             value = yamlutil.custom_tree_to_tagged_tree(value, ctx._asdf)
 
-        if ctx._validate_arrays:
-            validators = _VALIDATORS
+        validator = _get_validator(schema, ctx)
+        tree_validators = None if validator is None else _get_tree_validators(ctx)
+        if tree_validators is None:
+            if ctx._validate_arrays:
+                validators = _VALIDATORS
+            else:
+                validators = YAML_VALIDATORS
+            asdf_schema.validate(value, ctx=ctx._asdf, schema=schema, validators=validators)
         else:
-            validators = YAML_VALIDATORS
+            validator.validate(value)
+            treeutil.walk(
+                value, lambda node: [validate(node, False) for validate in tree_validators]
+            )
+
+
+def _get_tree_validators(ctx):
+    """
+    Get the checks `asdf.schema.validate` runs after the schema validation.
+
+    These are private asdf functions, so `None` is returned if they are
+    not available and the value should be validated with
+    `asdf.schema.validate` instead.
 
-        asdf_schema.validate(value, ctx=ctx._asdf, schema=schema, validators=validators)
+    Parameters
+    ----------
+    ctx : DataModel
+        The datamodel to use as context.
+
+    Returns
+    -------
+    list of callable or None
+        The checks to run on every node of the tagged tree.
+    """
+    try:
+        tree_validators = [asdf_schema._validate_large_literals]
+        if ctx._asdf.version >= versioning.RESTRICTED_KEYS_MIN_VERSION:
+            tree_validators.append(asdf_schema._validate_mapping_keys)
+    except AttributeError:
+        return None
+    return tree_validators
+
+
+def _get_validator(schema, ctx):
+    """
+    Get a validator for a cached schema, reusing it between calls.
+
+    Creating an asdf validator, and the validators it creates for each
+    subschema it descends into, is a large part of the cost of validating
+    a value. Cached schemas can't change so their validators are kept on
+    the schema (in ``_validators``) for each set of validators, asdf
+    release, ASDF Standard version and extensions.
+
+    A validator keeps state while it validates (the scopes of its
+    reference resolver and the validators it evolves for subschemas), so
+    each thread gets its own validator.
+
+    Parameters
+    ----------
+    schema : dict
+        The schema to validate against.
+    ctx : DataModel
+        The datamodel to use as context.
+
+    Returns
+    -------
+    asdf._jsonschema.Validator or None
+        The validator, or `None` if ``schema`` is not a cached schema.
+    """
+    if type(schema) is not mschema._FrozenDict:
+        return None
+    asdf_file = ctx._asdf
+    key = (
+        ctx._validate_arrays,
+        asdf.__version__,
+        asdf_file.version_string,
+        asdf_file.extension_manager,
+        threading.get_ident(),
+    )
+    try:
+        validators = schema._validators
+    except AttributeError:
+        validators = schema._validators = {}
+    validator = validators.get(key)
+    if validator is None:
+        # Build the validator with its own empty AsdfFile so the cache doesn't
+        # hold on to the model's AsdfFile (and the arrays in its blocks)
+        validator_ctx = asdf.AsdfFile(
+            version=asdf_file.version_string, extensions=asdf_file.extensions
+        )
+        validator = validators[key] = asdf_schema.get_validator(
+            schema,
+            ctx=validator_ctx,
+            validators=_VALIDATORS if ctx._validate_arrays else YAML_VALIDATORS,
+        )
+    return validator
 
 
 def _error_message(path, error):
@@ -5,6 +5,7 @@ from astropy.io import fits
 from astropy.time import Time
 from numpy.testing import assert_array_equal
 
+from stdatamodels import fits_support
 from stdatamodels.jwst.datamodels import ImageModel, MultiSlitModel, SlitModel
 
 
@@ -166,3 +167,28 @@ def test_slit_from_multislit():
     slit.int_times = slit.int_times
     model.slits.append(slit)
     slit = SlitModel(model.slits[0].instance)
+
+
+def test_multislit_compiled_writer_matches_legacy():
+    with MultiSlitModel() as model:
+        model.meta.instrument.name = "NIRSPEC"
+        for i in range(3):
+            slit = SlitModel(np.full((4, 5), i, dtype=np.float32))
+            slit.name = f"S{i}"
+            slit.xstart = i + 1
+            model.slits.append(slit)
+
+        hduls = [
+            fits_support.to_fits(model._instance, model._schema, legacy_writer=legacy)
+            for legacy in (True, False)
+        ]
+
+    legacy, compiled = ([hdu for hdu in hdul if hdu.name != "ASDF"] for hdul in hduls)
+    assert [(hdu.name, hdu.ver) for hdu in compiled] == [(hdu.name, hdu.ver) for hdu in legacy]
+    assert [hdu.name for hdu in compiled[1:4]] == ["SCI", "SCI", "SCI"]
+    for legacy_hdu, compiled_hdu in zip(legacy, compiled, strict=True):
+        assert [tuple(card) for card in compiled_hdu.header.cards] == [
+            tuple(card) for card in legacy_hdu.header.cards
+        ]
+        if legacy_hdu.data is not None:
+            assert_array_equal(compiled_hdu.data, legacy_hdu.data)
@@ -12,7 +12,7 @@ import numpy as np
 import pytest
 from astropy.io import fits
 
-from stdatamodels import DataModel
+from stdatamodels import DataModel, fits_support, util
 from stdatamodels.exceptions import NoTypeWarning, ValidationWarning
 from stdatamodels.jwst import datamodels
 from stdatamodels.jwst.datamodels import (
@@ -228,6 +228,101 @@ def test_open_cube(tmp_path):
             assert isinstance(model, CubeModel)
 
 
+def test_open_lazy_arrays(tmp_path):
+    """Arrays are only read when first accessed"""
+    path = tmp_path / "cube.fits"
+    shape = (2, 3, 4)
+    with CubeModel(shape) as model:
+        model.dq = np.ones(shape, dtype=np.uint32)
+        model.save(path)
+
+    with datamodels.open(path, lazy_arrays=True) as model:
+        assert isinstance(model, CubeModel)
+        for attr in ("data", "dq", "err"):
+            assert isinstance(model._instance[attr], util._LazyArray)
+        assert model.dq.shape == shape
+        assert np.all(model.dq == 1)
+        assert isinstance(model._instance["data"], util._LazyArray)
+
+    # by default the arrays are read when opening
+    with datamodels.open(path) as model:
+        pass
+    assert model.dq.shape == shape
+
+
+def test_open_indexes_hdus_once(tmp_path, monkeypatch):
+    """The HDUs indexed to choose the model class are reused to read it"""
+    path = tmp_path / "cube.fits"
+    with CubeModel((2, 3, 4)) as model:
+        model.save(path)
+
+    indexes = []
+    original_init = fits_support._HDUIndex.__init__
+
+    def init(self, hdulist):
+        indexes.append(self)
+        original_init(self, hdulist)
+
+    def fileinfo(self, index):
+        raise AssertionError("fileinfo renders every header")
+
+    monkeypatch.setattr(fits_support._HDUIndex, "__init__", init)
+    monkeypatch.setattr(fits.HDUList, "fileinfo", fileinfo)
+    with datamodels.open(path) as model:
+        assert isinstance(model, CubeModel)
+        assert model.meta.filename == "cube.fits"
+        assert model.data.shape == (2, 3, 4)
+    assert len(indexes) == 1
+
+
+@pytest.mark.parametrize("suffix", [".fits", ".asdf"])
+def test_resolve_model_class(tmp_path, suffix):
+    path = tmp_path / f"cube{suffix}"
+    with CubeModel((2, 3, 4)) as model:
+        model.save(path)
+
+    assert datamodels.resolve_model_class(path) is CubeModel
+    assert datamodels.resolve_model_class(str(path), guess=False) is CubeModel
+
+
+def test_resolve_model_class_guess(tmp_path):
+    path = tmp_path / "ramp.fits"
+    hdulist = fits.HDUList([fits.PrimaryHDU(), fits.ImageHDU(np.zeros((1, 2, 3, 4)), name="SCI")])
+    hdulist.writeto(path)
+
+    assert datamodels.resolve_model_class(path) is RampModel
+    with pytest.warns(NoTypeWarning), datamodels.open(path) as model:
+        assert isinstance(model, RampModel)
+    with pytest.raises(TypeError, match="guessing has been disabled"):
+        datamodels.resolve_model_class(path, guess=False)
+
+    with fits.open(path) as hdulist:
+        hdulist[0].header["REFTYPE"] = "FLAT"
+        assert datamodels.resolve_model_class(hdulist) is RampModel
+        # a header alone is resolved as a file without extensions
+        assert datamodels.resolve_model_class(hdulist[0].header) is ReferenceFileModel
+        hdulist[0].header["DATAMODL"] = "ImageModel"
+        assert datamodels.resolve_model_class(hdulist[0].header) is ImageModel
+
+
+def test_open_select_arrays(tmp_path):
+    """Arrays that are not selected are neither read nor created"""
+    path = tmp_path / "cube.fits"
+    shape = (2, 3, 4)
+    with CubeModel(shape) as model:
+        model.dq = np.ones(shape, dtype=np.uint32)
+        model.save(path)
+
+    with datamodels.open(path, arrays=["data", "dq"]) as model:
+        assert isinstance(model, CubeModel)
+        assert "err" not in model.instance
+        assert np.all(model.dq == 1)
+
+    with datamodels.open(path, exclude_arrays=["dq"]) as model:
+        assert "dq" not in model.instance
+        assert model.err.shape == shape
+
+
 @pytest.mark.parametrize(
     "model_class, shape",
     [
@@ -371,6 +466,30 @@ def test_memmap_deprecation(tmp_path):
     model = ImageModel((10, 10))
     model.save(path)
 
-    with pytest.warns(DeprecationWarning, match="Memory mapping is no longer supported"):
+    with pytest.warns(DeprecationWarning, match="memmap keyword argument is deprecated"):
         with datamodels.open(path, memmap=True):
             pass
+
+
+@pytest.mark.parametrize("suffix", [".asdf", ".fits"])
+def test_open_mmap_mode(tmp_path, suffix):
+    """Test that mmap_mode='r' returns read-only views of the file arrays."""
+    path = str(tmp_path / f"test{suffix}")
+    with RampModel((2, 3, 4, 5)) as model:
+        model.data[:] = 1
+        model.save(path)
+
+    with datamodels.open(path, mmap_mode="r") as model:
+        assert isinstance(model, RampModel)
+        assert not model.data.flags.writeable
+        np.testing.assert_equal(np.asarray(model.data), 1)
+
+
+def test_open_mmap_mode_copy_on_write_asdf(tmp_path):
+    """Test that copy-on-write is rejected for ASDF files."""
+    path = str(tmp_path / "test.asdf")
+    with ImageModel((10, 10)) as model:
+        model.save(path)
+
+    with pytest.raises(ValueError, match="only supported for FITS"):
+        datamodels.open(path, mmap_mode="c")
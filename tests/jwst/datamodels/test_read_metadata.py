@@ -1,5 +1,6 @@
 """Test utilities for loading metadata without loading entire model."""
 
+import gzip
 from pathlib import Path
 
 import numpy as np
@@ -8,7 +9,9 @@ from astropy.io import fits
 from astropy.time import Time
 
 import stdatamodels.jwst.datamodels as dm
-from stdatamodels.jwst.datamodels.util import _to_flat_dict, read_metadata
+from stdatamodels import fits_support
+from stdatamodels.jwst.datamodels import util
+from stdatamodels.jwst.datamodels.util import _to_flat_dict, read_metadata, read_metadata_many
 
 IMAGEFILE_ROOT = "jwst_image."
 MULTISLITFILE_ROOT = "jwst_multislit."
@@ -217,12 +220,92 @@ def test_data_never_loaded(model_path, monkeypatch):
         read_metadata(model_path)
 
     else:
-        from astropy.io import fits
+        # only the headers and the ASDF extension are read from the file
+        monkeypatch.setattr(fits, "open", throw_error)
+        read_metadata(model_path)
+
+
+def test_read_metadata_fields(model_path):
+    """Test selecting metadata with names and glob patterns."""
+    meta = read_metadata(model_path)
+
+    fields = ["meta.instrument.*", "meta.observation.date", "meta.not_a_field"]
+    selected = read_metadata(model_path, fields=fields)
+    expected = {
+        key: val
+        for key, val in meta.items()
+        if key.startswith("meta.instrument.") or key == "meta.observation.date"
+    }
+    assert selected == expected
+    assert selected["meta.instrument.filter"] == FILT
+
+    # a name selects everything below it
+    assert read_metadata(model_path, fields=["meta.instrument"]) == {
+        key: val for key, val in meta.items() if key.startswith("meta.instrument.")
+    }
+
+    nested = read_metadata(model_path, fields=["meta.instrument.filter"], flatten=False)
+    assert nested == {"meta": {"instrument": {"filter": FILT}}}
+
+
+@pytest.mark.parametrize("model_path", ["fits"], indirect=True)
+def test_read_metadata_fields_skip_asdf(model_path, monkeypatch):
+    """Test that the ASDF extension is not parsed if all fields are FITS keywords."""
+    import asdf
+
+    fields = ["meta.instrument.filter", "meta.observation.date"]
+    expected = read_metadata(model_path, fields=fields)
 
-        monkeypatch.setattr(fits.ImageHDU, "data", property(throw_error))
-        with fits.open(model_path) as hdulist:
-            monkeypatch.setattr(fits, "open", lambda *args, **kwargs: hdulist)
-            read_metadata(model_path)
+    def throw_error(*args, **kwargs):
+        raise Exception()  # noqa: TRY002
+
+    monkeypatch.setattr(asdf.util, "load_yaml", throw_error)
+    assert read_metadata(model_path, fields=fields) == expected
+    assert expected["meta.instrument.filter"] == FILT
+    assert expected["meta.observation.date"].startswith("2021-01-01")
+
+
+@pytest.mark.parametrize("model_path", ["fits"], indirect=True)
+def test_read_metadata_fields_not_in_header(model_path):
+    """Test that fields missing from the headers are read from the ASDF extension."""
+    with fits.open(model_path, mode="update") as hdulist:
+        del hdulist[0].header["FILTER"]
+
+    fields = ["meta.instrument.filter", "meta.observation.date"]
+    meta = read_metadata(model_path, fields=fields)
+    assert meta["meta.instrument.filter"] == FILT
+    assert meta == {key: val for key, val in read_metadata(model_path).items() if key in fields}
+
+
+def test_select_fields_recursive():
+    """Test selecting fields of a tree with references back into itself."""
+    wcs = {"name": "wcs"}
+    wcs["steps"] = [{"frame": "detector", "parent": wcs}]
+    tree = {"meta": {"wcs": wcs}}
+
+    matcher = fits_support._FieldMatcher(["meta.wcs.steps.*.frame"])
+    assert util._select_fields(tree, matcher) == {
+        "meta": {"wcs": {"steps": [{"frame": "detector"}]}}
+    }
+
+
+def test_read_metadata_fields_multislit(multislit_path):
+    """Test selecting metadata of array items."""
+    meta = read_metadata(multislit_path, fields=["slits.*.name"])
+    assert meta == {"slits.0.name": "slit0", "slits.1.name": "slit1"}
+
+    meta = read_metadata(multislit_path, fields=["slits.1.name"], flatten=False)
+    assert meta == {"slits": [{}, {"name": "slit1"}]}
+
+
+@pytest.mark.parametrize("multislit_path", ["fits"], indirect=True)
+def test_read_metadata_gzip(multislit_path):
+    """Test reading metadata from a gzipped FITS file."""
+    gzip_path = multislit_path.with_name(multislit_path.name + ".gz")
+    with gzip.open(gzip_path, "wb") as fileobj:
+        fileobj.write(multislit_path.read_bytes())
+
+    assert read_metadata(gzip_path) == read_metadata(multislit_path)
 
 
 def test_error_read_json():
@@ -277,3 +360,52 @@ def test_nested_list_to_flat_dict(is_tuple):
         "1.d.0": 5,
         "1.d.1": 6,
     }
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_read_metadata_many(tmp_path, imagemodel, multislitmodel, workers):
+    """Test reading the metadata of several files, with one bad file."""
+    paths = [tmp_path / "image.fits", tmp_path / "multislit.fits", tmp_path / "image.asdf"]
+    imagemodel.save(paths[0])
+    multislitmodel.save(paths[1])
+    imagemodel.save(paths[2])
+    bad_path = tmp_path / "bad.fits"
+    bad_path.write_bytes(b"not a FITS file")
+    paths.insert(1, bad_path)
+
+    results = list(read_metadata_many(paths, workers=workers))
+
+    assert [result.path for result in results] == paths
+    assert isinstance(results[1].error, OSError)
+    assert results[1].metadata is None
+    for result in results[:1] + results[2:]:
+        assert result.error is None
+        assert result.metadata == read_metadata(result.path)
+
+
+def test_read_metadata_many_fields(model_path):
+    """Test that only the requested fields are returned."""
+    fields = ["meta.instrument.filter", "meta.model_type", "meta.not_a_field"]
+    (result,) = read_metadata_many([model_path], workers=1, fields=fields)
+    assert result.metadata == {"meta.instrument.filter": FILT, "meta.model_type": "ImageModel"}
+
+
+class _InitArgsError(Exception):
+    """An exception that can be pickled but not unpickled."""
+
+    def __init__(self, path, reason):
+        super().__init__(f"{path}: {reason}")
+
+
+def test_read_metadata_many_unpicklable_error(tmp_path, imagemodel, monkeypatch):
+    """Test that errors that can't be sent back from a worker are replaced."""
+    paths = [tmp_path / "image.fits"]
+    imagemodel.save(paths[0])
+
+    def read_metadata(path, **kwargs):
+        raise _InitArgsError(path, "bad")
+
+    monkeypatch.setattr(util, "read_metadata", read_metadata)
+    (result,) = read_metadata_many(paths, workers=1)
+    assert isinstance(result.error, RuntimeError)
+    assert "_InitArgsError" in str(result.error)
@@ -1,12 +1,14 @@
+import io
 import re
 
+import asdf.constants
 import asdf.schema
 import numpy as np
 import pytest
 from astropy.io import fits
 from numpy.testing import assert_allclose, assert_array_almost_equal, assert_array_equal
 
-from stdatamodels import DataModel, fits_support
+from stdatamodels import DataModel, fits_support, util
 
 from .models import FitsModel, PureFitsModel
 
@@ -96,6 +98,42 @@ def test_extra_fits(tmp_path):
         assert any(h for h in dm.extra_fits.PRIMARY.header if h == ["FOO", "BAR", ""])
 
 
+def test_lazy_extra_fits(tmp_path):
+    file_path = tmp_path / "test.fits"
+    hdul = fits.HDUList([fits.PrimaryHDU(), fits.ImageHDU(np.ones(3), name="EXTRA")])
+    hdul[0].header["FOO"] = "BAR"
+    hdul.writeto(file_path)
+
+    with FitsModel(file_path, lazy_arrays=True, lazy_extra_fits=True) as dm:
+        assert isinstance(dm._instance["extra_fits"], util._Lazy)
+        assert not util._find_lazy(dm._instance, util._LazyArray)
+        assert ["FOO", "BAR", ""] in dm.extra_fits.PRIMARY.header
+        assert_array_equal(dm.extra_fits.EXTRA.data, 1)
+
+    # extra_fits is collected when saving, even if never accessed
+    file_path2 = tmp_path / "test2.fits"
+    with FitsModel(file_path, lazy_arrays=True, lazy_extra_fits=True) as dm:
+        dm.save(file_path2)
+
+    with FitsModel(file_path2) as dm:
+        assert ["FOO", "BAR", ""] in dm.extra_fits.PRIMARY.header
+        assert_array_equal(dm.extra_fits.EXTRA.data, 1)
+
+
+@pytest.mark.parametrize("lazy", [True, False])
+def test_lazy_extra_fits_empty(tmp_path, lazy):
+    file_path = tmp_path / "test.fits"
+    with FitsModel(data=np.ones((4, 5), dtype=np.float32)) as dm:
+        dm.save(file_path)
+
+    # with nothing to collect extra_fits is left out with either loading mode
+    with FitsModel(file_path, lazy_arrays=lazy, lazy_extra_fits=lazy) as dm:
+        assert "extra_fits" not in dm.instance
+    with FitsModel(file_path, lazy_arrays=lazy, lazy_extra_fits=lazy) as dm:
+        assert not any(key.startswith("extra_fits") for key, _ in dm.items())
+        assert "extra_fits" not in dm._instance
+
+
 def test_asdf_extension_data_is_view(tmp_path):
     """
     Ensure that array-like data are not duplicated in the asdf extension.
@@ -127,7 +165,52 @@ def test_asdf_extension_data_is_view(tmp_path):
 
     # check that the ASDF extension contains a view of the extra_fits data
     with FitsModel(file_path) as dm2:
-        assert_allclose(dm2._asdf.tree["extra_fits"]["EXTRA"]["data"], extra_data)
+        assert_allclose(dm2.extra_fits.EXTRA.data, extra_data)
+
+
+def test_extra_fits_links(tmp_path):
+    """Arrays in many extra_fits extensions are linked wherever they appear in the tree."""
+    file_path = tmp_path / "test.fits"
+    extra_data = [np.full((10, 10), i, dtype=np.float32) for i in range(300)]
+
+    with FitsModel() as dm:
+        dm.extra_fits = {}
+        for i, data in enumerate(extra_data):
+            dm.extra_fits.instance[f"EXTRA{i}"] = {"data": data, "header": []}
+        # a second reference to an extra_fits array elsewhere in the tree
+        dm.instance["extra_ref"] = extra_data[150]
+        dm.save(file_path)
+
+    with fits.open(file_path) as hdul:
+        assert len(hdul) == 302
+        # the ASDF extension only holds links, no binary blocks
+        asdf_bytes = hdul["ASDF"].data.tobytes()
+        assert b"fits:EXTRA150,1" in asdf_bytes
+        assert asdf.constants.BLOCK_MAGIC not in asdf_bytes
+
+    with FitsModel(file_path) as dm:
+        assert_array_equal(dm.extra_ref, extra_data[150])
+        assert_array_equal(dm.extra_fits.EXTRA299.data, extra_data[299])
+
+
+def test_asdf_extension_read_without_copy(tmp_path):
+    file_path = tmp_path / "test.fits"
+    with FitsModel(data=np.zeros((4, 5), dtype=np.float32)) as dm:
+        dm.save(file_path)
+
+    with fits.open(file_path) as hdul:
+        asdf_data = hdul["ASDF"].data
+        reader = fits_support._BufferReader(asdf_data)
+        assert np.shares_memory(np.asarray(reader._buffer), asdf_data)
+
+        assert reader.read(5) == b"#ASDF"
+        reader.seek(-3, io.SEEK_END)
+        assert reader.tell() == len(reader._buffer) - 3
+        assert len(reader.read()) == 3
+        assert reader.read(1) == b""
+
+        with fits_support.from_fits_asdf(hdul) as af:
+            assert_array_equal(af["data"], 0)
 
 
 def test_hdu_order(tmp_path):
@@ -190,6 +273,223 @@ def test_non_contiguous_array(tmp_path):
         assert_array_equal(dm.err, err)
 
 
+@pytest.fixture
+def fits_model_path(tmp_path):
+    file_path = tmp_path / "test.fits"
+    with FitsModel(data=np.arange(20, dtype=np.float32).reshape(4, 5)) as dm:
+        dm.save(file_path)
+    return file_path
+
+
+def test_mmap_mode_readonly(fits_model_path):
+    with FitsModel(fits_model_path, mmap_mode="r") as dm:
+        assert not dm.data.flags.writeable
+        assert_array_equal(dm.data, np.arange(20).reshape(4, 5))
+        with pytest.raises(ValueError, match="read-only"):
+            dm.data[0, 0] = 42
+        # the file stays open until the model is closed
+        assert len(dm._file_references) == 1
+
+        # assigning a copy promotes the array to memory
+        dm.data = dm.data.copy()
+        dm.data[0, 0] = 42
+        assert dm.data.flags.writeable
+    assert not dm._file_references
+
+
+def test_mmap_mode_copy_on_write(fits_model_path):
+    with FitsModel(fits_model_path, mmap_mode="c") as dm:
+        dm.data[0, 0] = 42
+        assert dm.data[0, 0] == 42
+
+    with FitsModel(fits_model_path) as dm:
+        assert dm.data[0, 0] == 0
+
+
+def test_lazy_arrays(tmp_path):
+    file_path = tmp_path / "test.fits"
+    data = np.arange(20, dtype=np.float32).reshape(4, 5)
+    with FitsModel(data=data, dq=np.ones((4, 5), dtype=np.uint32)) as dm:
+        dm.save(file_path)
+
+    with FitsModel(file_path, lazy_arrays=True) as dm:
+        # arrays are read from the open file on first access
+        assert len(dm._file_references) == 1
+        assert isinstance(dm._instance["data"], util._LazyArray)
+        assert isinstance(dm._instance["dq"], util._LazyArray)
+        assert "data" not in dm.to_flat_dict(include_arrays=False)
+
+        assert dm.data.flags.writeable
+        assert_array_equal(dm.data, data)
+        assert dm._instance["data"] is dm.data
+        assert isinstance(dm._instance["dq"], util._LazyArray)
+
+        # whole tree operations read the remaining arrays
+        dm.validate()
+        assert_array_equal(dm._instance["dq"], 1)
+
+    with FitsModel(file_path, lazy_arrays=True) as dm:
+        # placeholders are never exposed
+        assert isinstance(dm.instance["data"], np.ndarray)
+
+    # by default all arrays are read and the file is closed
+    dm = FitsModel(file_path)
+    assert not dm._file_references
+    assert isinstance(dm._instance["dq"], np.ndarray)
+    dm.close()
+    assert_array_equal(dm.data, data)
+    assert_array_equal(dm.copy().dq, 1)
+
+
+def test_instance_without_lazy_arrays(fits_model_path, monkeypatch):
+    def fail(tree):
+        raise AssertionError("tree walked for placeholders")
+
+    monkeypatch.setattr(util, "materialize_lazy", fail)
+    with FitsModel(fits_model_path) as dm:
+        assert isinstance(dm.instance["data"], np.ndarray)
+        assert isinstance(dm.meta.instance, dict)
+
+
+@pytest.mark.parametrize("mmap_mode", [None, "r"])
+def test_read_section(tmp_path, mmap_mode):
+    file_path = tmp_path / "test.fits"
+    data = np.arange(20, dtype=np.float32).reshape(4, 5)
+    with FitsModel(data=data, dq=np.arange(20).reshape(4, 5)) as dm:
+        dm.save(file_path)
+
+    with FitsModel(file_path, mmap_mode=mmap_mode, lazy_arrays=True) as dm:
+        section = dm.read_section("data", np.s_[1:3, 2:4])
+        assert_array_equal(section, data[1:3, 2:4])
+        # the dq schema datatype is uint32
+        section = dm.read_section("dq", 2)
+        assert section.dtype == np.uint32
+        assert_array_equal(section, data[2])
+        assert isinstance(dm._instance["data"], util._LazyArray)
+
+        # loaded arrays are sliced
+        assert dm.data.shape == (4, 5)
+        assert_array_equal(dm.read_section("data", np.s_[1, 2:4]), data[1, 2:4])
+
+
+@pytest.mark.parametrize("lazy_arrays", [True, False])
+def test_read_section_uses_hdu_section(tmp_path, monkeypatch, lazy_arrays):
+    file_path = tmp_path / "test.fits"
+    data = np.arange(20, dtype=np.float32).reshape(4, 5)
+    with FitsModel(data=data) as dm:
+        dm.save(file_path)
+
+    sections = []
+    read_hdu_section = fits_support._read_hdu_section
+
+    def record(key, hdu, *args):
+        sections.append(key)
+        return read_hdu_section(key, hdu, *args)
+
+    monkeypatch.setattr(fits_support, "_read_hdu_section", record)
+    # patched before opening, placeholders keep the section loader they are made with
+    with FitsModel(file_path, lazy_arrays=lazy_arrays) as dm:
+        assert_array_equal(dm.read_section("data", 1), data[1])
+    assert sections == ([1] if lazy_arrays else [])
+
+
+def test_to_fits_stream(tmp_path):
+    (tmp_path / "stream").mkdir()
+    (tmp_path / "save").mkdir()
+    data = np.arange(128, dtype=np.float32).reshape(8, 16)
+    # values above 2**31 exercise the BZERO shift of unsigned integers
+    dq = (np.arange(128, dtype=np.uint32) * 33554431).reshape(8, 16)
+
+    with FitsModel() as dm:
+        arrays = {"data": data.shape, "dq": dq.shape}
+        with dm.to_fits_stream(str(tmp_path / "stream" / "test.fits"), arrays) as stream:
+            for i in range(len(data)):
+                stream.write("data", i, data[i])
+                stream.write("dq", i, dq[i].astype(np.int64))
+        # the streamed arrays are not added to the model
+        assert "data" not in dm._instance
+
+        dm.data = data
+        dm.dq = dq
+        dm.save(tmp_path / "save" / "test.fits")
+
+    streamed = (tmp_path / "stream" / "test.fits").read_bytes()
+    assert streamed == (tmp_path / "save" / "test.fits").read_bytes()
+
+    with FitsModel(tmp_path / "stream" / "test.fits") as dm:
+        assert_array_equal(dm.data, data)
+        assert_array_equal(dm.dq, dq)
+
+
+def test_to_fits_stream_error(tmp_path):
+    file_path = tmp_path / "test.fits"
+    with FitsModel() as dm:
+        with pytest.raises(RuntimeError):
+            with dm.to_fits_stream(file_path, {"data": (4, 5)}) as stream:
+                stream.write("data", 0, np.ones(5))
+                raise RuntimeError()
+        # incomplete files are removed
+        assert not file_path.exists()
+
+        dm.save(file_path)
+        with pytest.raises(FileExistsError):
+            dm.to_fits_stream(file_path, {"data": (4, 5)})
+        with dm.to_fits_stream(file_path, {"data": (4, 5)}, overwrite=True) as stream:
+            with pytest.raises(KeyError, match="not a streamed array"):
+                stream.write("err", 0, np.ones(5))
+        with pytest.raises(ValueError, match="closed"):
+            stream.write("data", 0, np.ones(5))
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"arrays": ["data", "dq"]}, {"exclude_arrays": ["err"]}, {"arrays": ["d*"]}],
+)
+def test_select_arrays(tmp_path, kwargs):
+    file_path = tmp_path / "test.fits"
+    data = np.arange(20, dtype=np.float32).reshape(4, 5)
+    with FitsModel(data=data, dq=np.ones((4, 5)), err=np.ones((4, 5))) as dm:
+        dm.save(file_path)
+
+    for init in (file_path, fits.open(file_path)):
+        with FitsModel(init, **kwargs) as dm:
+            assert "err" not in dm.instance
+            assert "extra_fits" not in dm.instance
+            assert_array_equal(dm.data, data)
+            assert_array_equal(dm.dq, 1)
+        if isinstance(init, fits.HDUList):
+            init.close()
+
+
+@pytest.mark.parametrize("with_asdf", [True, False])
+def test_max_workers(tmp_path, with_asdf):
+    file_path = tmp_path / "test.fits"
+    data = np.arange(20, dtype=np.float32).reshape(4, 5)
+    with FitsModel(data=data, dq=np.arange(20).reshape(4, 5)) as dm:
+        dm.save(file_path)
+    if not with_asdf:
+        # read the arrays through the schema, converting them
+        with fits.open(file_path) as hdulist:
+            del hdulist["ASDF"]
+            hdulist.writeto(file_path, overwrite=True)
+
+    for init in (file_path, fits.open(file_path)):
+        with FitsModel(init, max_workers=2) as dm:
+            # the arrays are already loaded but validated on first access
+            assert isinstance(dm._instance["data"], util._LazyArray)
+            assert isinstance(dm._instance["data"]._make_array(), np.ndarray)
+            assert_array_equal(dm.data, data)
+            assert dm.dq.dtype == np.uint32
+            assert_array_equal(dm.dq, data)
+        if isinstance(init, fits.HDUList):
+            init.close()
+
+
+def test_mmap_mode_invalid(fits_model_path):
+    with pytest.raises(ValueError, match="Invalid mmap_mode"):
+        FitsModel(fits_model_path, mmap_mode="w")
+
+
 def test_table_with_metadata(tmp_path):
     file_path = tmp_path / "test.fits"
 
@@ -551,6 +851,15 @@ def test_data_array(tmp_path):
         ("SIMPLE", True),
         ("EXTEND", True),
         ("INSTRUME", False),
+        ("", True),
+        ("NAXIS", True),
+        ("NAXIS123", True),
+        ("NAXIS1234", False),
+        ("PSCAL1", True),
+        ("PSCAL12", False),
+        ("TTYPE", False),
+        ("TTYPEA", False),
+        ("TTYP", False),
     ],
 )
 def test_is_builtin_fits_keyword(keyword, result):
@@ -698,3 +1007,308 @@ def test_fitsrec_for_non_schema_data(tmp_path):
     )
     fn = tmp_path / "test.fits"
     m.save(fn)
+
+
+def test_fits_schema_index():
+    schema = {
+        "type": "object",
+        "properties": {
+            "meta": {
+                "type": "object",
+                "properties": {
+                    "telescope": {"type": "string", "fits_keyword": "TELESCOP"},
+                },
+            },
+            "slits": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string", "fits_keyword": "SLTNAME", "fits_hdu": "SCI"},
+                        "data": {"fits_hdu": "SCI", "datatype": "float32"},
+                    },
+                },
+            },
+        },
+    }
+    index = fits_support._compile_fits_schema_index(schema)
+    assert [(e.path, e.hdu_name, e.fits_keyword, e.is_array) for e in index] == [
+        (("meta", "telescope"), 0, "TELESCOP", False),
+        (("slits", None, "name"), "SCI", "SLTNAME", False),
+        (("slits", None, "data"), "SCI", None, True),
+    ]
+    assert list(index[1].item_paths(2)) == [(["slits", 0, "name"], 0), (["slits", 1, "name"], 1)]
+    assert list(index[0].item_paths(2)) == [(["meta", "telescope"], None)]
+
+
+def test_fits_schema_index_cached():
+    with FitsModel() as dm:
+        index = fits_support._get_fits_schema_index(dm.schema)
+        assert fits_support._get_fits_schema_index(dm.schema) is index
+        assert ("meta", "telescope") in [e.path for e in index]
+
+    # schemas that may be modified are compiled on every call
+    schema = {
+        "type": "object",
+        "properties": {"data": {"fits_hdu": "SCI", "datatype": "float32"}},
+    }
+    index = fits_support._get_fits_schema_index(schema)
+    assert len(index) == 1
+    assert fits_support._get_fits_schema_index(schema) is not index
+
+
+def test_writer_cards_match_legacy():
+    schema = {
+        "type": "object",
+        "properties": {
+            "meta": {
+                "title": "Section",
+                "type": "object",
+                "properties": {
+                    "first": {"title": "First", "type": "string", "fits_keyword": "KEYA"},
+                    "notes": {"fits_keyword": "COMMENT"},
+                    "sci": {
+                        "title": "On SCI",
+                        "type": "string",
+                        "fits_keyword": "SCIKEY",
+                        "fits_hdu": "SCI",
+                    },
+                    # the same keyword again updates the card in place
+                    "second": {"title": "Second", "type": "string", "fits_keyword": "KEYA"},
+                    "last": {"type": "integer", "fits_keyword": "KEYB"},
+                },
+            },
+            "data": {"fits_hdu": "SCI", "datatype": "float32"},
+        },
+    }
+    tree = {
+        "meta": {"first": "a", "notes": ["x", "y"], "sci": "s", "second": "b", "last": 1},
+        "data": np.ones((2, 2), dtype=np.float32),
+    }
+    legacy, compiled = (
+        fits_support.to_fits(tree, schema, legacy_writer=legacy) for legacy in (True, False)
+    )
+    assert compiled[0].header["KEYA"] == "b"
+    assert list(compiled[0].header["COMMENT"]) == ["x", "y"]
+    for legacy_hdu, compiled_hdu in zip(legacy[:-1], compiled[:-1], strict=True):
+        assert [tuple(card) for card in compiled_hdu.header.cards] == [
+            tuple(card) for card in legacy_hdu.header.cards
+        ]
+
+
+def test_writer_keeps_given_headers():
+    schema = {
+        "type": "object",
+        "properties": {
+            "meta": {
+                "type": "object",
+                "properties": {
+                    "first": {"title": "First", "type": "string", "fits_keyword": "KEYA"},
+                    "sci": {"type": "string", "fits_keyword": "SCIKEY", "fits_hdu": "SCI"},
+                },
+            },
+            "data": {"fits_hdu": "SCI", "datatype": "float32"},
+        },
+    }
+    tree = {"meta": {"first": "a", "sci": "s"}, "data": np.ones((2, 2), dtype=np.float32)}
+    hdulist = fits.HDUList([fits.PrimaryHDU()])
+    header = hdulist[0].header
+    fits_support.to_fits(tree, schema, hdulist=hdulist)
+    # cards are added to the headers of HDUs the caller passed in
+    assert hdulist[0].header is header
+    new = fits_support.to_fits(tree, schema)
+    for given_hdu, new_hdu in zip(hdulist[:-1], new[:-1], strict=True):
+        assert [tuple(card) for card in given_hdu.header.cards] == [
+            tuple(card) for card in new_hdu.header.cards
+        ]
+    assert new["SCI"].header["SCIKEY"] == "s"
+
+
+def test_writer_any_of_matches_legacy():
+    schema = {
+        "type": "object",
+        "properties": {
+            "meta": {
+                "anyOf": [
+                    {
+                        "type": "object",
+                        "properties": {"a": {"type": "string", "fits_keyword": "KEYA"}},
+                        "required": ["a"],
+                    },
+                    {
+                        "type": "object",
+                        "properties": {"b": {"type": "string", "fits_keyword": "KEYB"}},
+                    },
+                ],
+            },
+        },
+    }
+    assert fits_support._compile_fits_writer_plan(schema) is fits_support._USE_LEGACY_WRITER
+
+    # only the branches up to the first valid one are written
+    for meta, keywords in (({"a": "x", "b": "y"}, ["KEYA"]), ({"b": "y"}, ["KEYB"])):
+        legacy, compiled = (
+            fits_support.to_fits({"meta": meta}, schema, legacy_writer=legacy)
+            for legacy in (True, False)
+        )
+        assert [key for key in compiled[0].header if key.startswith("KEY")] == keywords
+        assert [tuple(card) for card in compiled[0].header.cards] == [
+            tuple(card) for card in legacy[0].header.cards
+        ]
+
+
+@pytest.mark.parametrize("legacy", ["1", "0"])
+def test_legacy_writer_envar(tmp_path, monkeypatch, legacy):
+    def fail(*args, **kwargs):
+        raise AssertionError("wrong writer used")
+
+    if legacy == "1":
+        monkeypatch.setattr(fits_support, "_compile_fits_writer_plan", fail)
+    else:
+        monkeypatch.setattr(fits_support, "_get_validators", fail)
+    monkeypatch.setenv("LEGACY_FITS_WRITER", legacy)
+
+    file_path = tmp_path / "test.fits"
+    with FitsModel(data=np.ones((4, 4), dtype=np.float32)) as dm:
+        dm.meta.origin = "STScI"
+        dm.save(file_path)
+
+    with fits.open(file_path) as hdulist:
+        assert hdulist[0].header["ORIGIN"] == "STScI"
+        assert_array_equal(hdulist["SCI"].data, 1)
+
+
+def test_fits_hash(fits_model_path):
+    with fits.open(fits_model_path) as hdulist:
+        tree = fits_support.from_fits_asdf(hdulist).tree
+        assert tree[fits_support.FITS_HASH_ALGORITHM_KEY] == fits_support.FITS_HASH_ALGORITHM
+
+        # the header blocks in the file match the rendered headers
+        assert fits_support.fits_hash(hdulist) == tree[fits_support.FITS_HASH_KEY]
+        assert (
+            fits_support.fits_hash(hdulist, algorithm="sha256") == tree[fits_support.FITS_HASH_KEY]
+        )
+
+        # modified headers are not hashed from the file
+        hdulist[0].header["ORIGIN"] = "UNDER THE COUCH"
+        assert fits_support.fits_hash(hdulist) != tree[fits_support.FITS_HASH_KEY]
+        assert fits_support.fits_hash(hdulist) == fits_support.fits_hash(
+            hdulist, algorithm="sha256"
+        )
+
+        with pytest.raises(ValueError, match="Unknown FITS hash algorithm"):
+            fits_support.fits_hash(hdulist, algorithm="md5")
+
+
+class _WithoutAttribute:
+    # forwards to an HDU or header, as if it didn't have an attribute
+    def __init__(self, wrapped, attribute):
+        self._wrapped = wrapped
+        self._attribute = attribute
+
+    def __getattr__(self, name):
+        if name == self._attribute:
+            raise AttributeError(name)
+        value = getattr(self._wrapped, name)
+        if name == "_header":
+            return _WithoutAttribute(value, self._attribute)
+        return value
+
+
+@pytest.mark.parametrize("attribute", ["_file", "_header_offset", "_data_offset", "_modified"])
+def test_fits_hash_without_private_attributes(fits_model_path, attribute):
+    with fits.open(fits_model_path) as hdulist:
+        tree = fits_support.from_fits_asdf(hdulist).tree
+        assert all(fits_support._raw_header_block(hdu) is not None for hdu in hdulist)
+        # astropy internals used to read the header blocks may go away
+        hdus = [_WithoutAttribute(hdu, attribute) for hdu in hdulist]
+        assert all(fits_support._raw_header_block(hdu) is None for hdu in hdus)
+        assert fits_support.fits_hash(hdus) == tree[fits_support.FITS_HASH_KEY]
+        assert fits_support.fits_hash(hdus) == fits_support.fits_hash(hdulist)
+
+
+def test_fits_hash_without_algorithm(tmp_path, fits_model_path):
+    # files written before the hash algorithm was recorded still skip updating
+    file_path = tmp_path / "old.fits"
+    with fits.open(fits_model_path) as hdulist:
+        tree = fits_support.from_fits_asdf(hdulist).tree
+        del tree[fits_support.FITS_HASH_ALGORITHM_KEY]
+        tree[fits_support.FITS_HASH_KEY] = fits_support.fits_hash(hdulist, algorithm="sha256")
+        del hdulist["ASDF"]
+        hdulist.append(fits_support._create_asdf_hdu(tree))
+        hdulist.writeto(file_path)
+
+    with fits.open(file_path) as hdulist:
+        with FitsModel() as dm:
+            asdf_struct = fits_support.from_fits_asdf(hdulist)
+            assert fits_support._can_skip_fits_update(hdulist, asdf_struct, dm)
+
+
+def test_read_fits_headers(tmp_path):
+    file_path = tmp_path / "test.fits"
+    hdulist = fits.HDUList([fits.PrimaryHDU(np.zeros((3, 3)))])
+    for ver in (1, 2):
+        hdulist.append(fits.ImageHDU(np.full((5, 7), ver, dtype=np.int16), name="SCI", ver=ver))
+    table = fits.BinTableHDU.from_columns(
+        [fits.Column(name="A", format="3B", array=np.arange(6, dtype=np.uint8).reshape(2, 3))],
+        name="TAB",
+    )
+    hdulist.append(table)
+    hdulist.writeto(file_path)
+
+    headers = fits_support._read_fits_headers(file_path, data_extnames=("TAB",))
+    with fits.open(file_path) as expected:
+        assert len(headers) == len(expected)
+        for hdu, expected_hdu in zip(headers, expected, strict=True):
+            assert hdu.header == expected_hdu.header
+            assert (hdu.name, hdu.ver) == (expected_hdu.name, expected_hdu.ver)
+
+    assert headers["sci"] is headers[1]
+    assert headers[("SCI", 2)] is headers[2]
+    assert headers["PRIMARY"] is headers[0]
+    assert headers["TAB"].raw_data == bytes(range(6))
+    assert headers["SCI"].raw_data is None
+    with pytest.raises(KeyError):
+        headers[("SCI", 3)]
+    with pytest.raises(KeyError):
+        headers[(0, 1)]
+    assert fits_support.get_hdu(headers, "SCI", index=1) is headers[2]
+
+
+def test_read_fits_headers_not_fits(tmp_path):
+    file_path = tmp_path / "test.fits"
+    file_path.write_bytes(b"\0" * 2880)
+    with pytest.raises(OSError, match="FITS primary header"):
+        fits_support._read_fits_headers(file_path)
+
+
+def test_hdu_index():
+    hdulist = fits.HDUList([fits.PrimaryHDU()])
+    for ver in (1, 2):
+        for name in ("SCI", "DQ"):
+            hdulist.append(fits.ImageHDU(np.zeros(3), name=name, ver=ver))
+    # duplicates resolve to the first match, as with HDUList
+    hdulist.append(fits.ImageHDU(np.zeros(3), name="SCI", ver=1))
+    hdulist.append(fits.ImageHDU(np.zeros(3)))
+
+    hdus = fits_support._HDUIndex(hdulist)
+    for key in (0, 5, "sci", " DQ ", "PRIMARY", ("SCI", 2), ("dq", 1), ("PRIMARY", 1), ""):
+        assert hdus.get(key) is hdulist[key]
+    for key in (9, "ERR", ("SCI", 3), (0, 1)):
+        assert hdus.get(key) is None
+    for hdu_name, index in ((0, None), (0, 0), ("SCI", None), ("SCI", 1), ("DQ", 0)):
+        expected = fits_support.get_hdu(hdulist, hdu_name, index=index)
+        assert hdus.find(hdu_name, index) is expected
+        assert fits_support.get_hdu(hdulist, hdu_name, index=index, _hdus=hdus) is expected
+    assert hdus.find("SCI", 2) is None
+    assert hdus.find(0, 1) is None
+    assert hdus.find_data(hdulist[3].data) is hdulist[3]
+    assert hdus.position(hdulist[4]) == 4
+
+    # HDUs made through the index are added to it
+    hdu = hdus.get_or_make("ERR", index=1)
+    assert hdulist[-1] is hdu
+    assert hdu.ver == 2
+    assert hdus.get(("ERR", 2)) is hdu
+    assert hdus.position(hdu) == len(hdulist) - 1
+    assert hdus.get_or_make("SCI", index=1) is hdulist[3]
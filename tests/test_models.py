@@ -1,3 +1,4 @@
+import copy
 import gc
 
 import asdf
@@ -109,7 +110,7 @@ def test_init_invalid_shape():
 def test_init_invalid_shape2():
     """Requested more dimensions than max_ndim"""
     with BasicModel() as dm:
-        schema = dm._schema
+        schema = copy.deepcopy(dm._schema)
     schema["properties"]["data"]["max_ndim"] = 1
     schema["properties"]["data"]["ndim"] = None
     with pytest.raises(ValueError):
@@ -119,7 +120,7 @@ def test_init_invalid_shape2():
 def test_init_incompatible_datamodel():
     """Initialized a model with a different model type that has invalid dimensions"""
     input_model = FitsModel((50, 50))
-    schema = input_model._schema
+    schema = copy.deepcopy(input_model._schema)
     schema["properties"]["data"]["ndim"] = 3
     with pytest.warns(ValidationWarning):
         BasicModel(input_model, schema=schema)
@@ -385,7 +386,7 @@ def test_from_asdf_deprecation():
 
 
 def test_memmap_deprecation():
-    with pytest.warns(DeprecationWarning, match="Memory mapping is no longer supported"):
+    with pytest.warns(DeprecationWarning, match="memmap keyword argument is deprecated"):
         DataModel(memmap=True)
 
 
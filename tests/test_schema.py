@@ -1,3 +1,5 @@
+import copy
+
 import asdf
 import numpy as np
 import pytest
@@ -7,7 +9,13 @@ from astropy.modeling import models
 from numpy.testing import assert_array_equal
 
 from stdatamodels import DataModel
-from stdatamodels.schema import merge_property_trees
+from stdatamodels.properties import _get_schema_for_property
+from stdatamodels.schema import (
+    clear_schema_cache,
+    load_merged_schema,
+    merge_property_trees,
+    schema_cache_info,
+)
 
 from .models import BasicModel, FitsModel, TableModel, TransformModel, ValidationModel
 
@@ -211,3 +219,67 @@ def test_merge_property_tree_top():
     }
     f = merge_property_trees(s)
     assert f["id"] == "foo"
+
+
+def test_schema_cache():
+    clear_schema_cache()
+
+    with BasicModel() as dm1, BasicModel() as dm2:
+        assert dm1.schema is dm2.schema
+
+    info = schema_cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+    assert info.currsize == 1
+    assert info.build_time > 0
+
+    clear_schema_cache(BasicModel.schema_url)
+    assert schema_cache_info().currsize == 0
+    with BasicModel() as dm3:
+        assert dm3.schema is not dm1.schema
+        assert dm3.schema == dm1.schema
+
+
+def test_cached_schema_is_read_only():
+    schema = load_merged_schema(BasicModel.schema_url)
+    with pytest.raises(TypeError, match="read-only"):
+        schema["properties"]["data"]["ndim"] = 3
+    table_schema = load_merged_schema(TableModel.schema_url)
+    with pytest.raises(TypeError, match="read-only"):
+        table_schema["properties"]["table"]["datatype"].append({"name": "foo"})
+
+    # deep copies can be modified and used to create models
+    schema_copy = copy.deepcopy(schema)
+    schema_copy["properties"]["data"]["ndim"] = 3
+    assert type(schema_copy) is dict
+    assert schema["properties"]["data"]["ndim"] == 2
+    with BasicModel((2, 3, 4), schema=schema_copy) as dm:
+        assert dm.data.shape == (2, 3, 4)
+
+
+def test_property_schema_memo():
+    schema = load_merged_schema(BasicModel.schema_url)
+    meta_schema = _get_schema_for_property(schema, "meta")
+    assert _get_schema_for_property(schema, "meta") is meta_schema
+    assert schema._property_schemas["meta"] is meta_schema
+
+    # missing properties are memoized as read-only empty schemas
+    missing = _get_schema_for_property(schema, "not_a_property")
+    assert missing == {}
+    with pytest.raises(TypeError, match="read-only"):
+        missing["type"] = "string"
+
+    # modifiable schemas are searched on every lookup
+    schema_copy = copy.deepcopy(schema)
+    assert _get_schema_for_property(schema_copy, "foo") == {}
+    schema_copy["properties"]["foo"] = {"type": "string"}
+    assert _get_schema_for_property(schema_copy, "foo") == {"type": "string"}
+
+    with BasicModel() as dm:
+        dm.meta.telescope = "JWST"
+        assert dm.meta.telescope == "JWST"
+        with pytest.raises(AttributeError):
+            dm.meta.not_a_property  # noqa: B018
+        dm.add_schema_entry("meta.foo", {"type": "string"})
+        dm.meta.foo = "bar"
+        assert dm.meta.foo == "bar"
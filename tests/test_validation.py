@@ -1,12 +1,15 @@
+import copy
 import gc
 import warnings
 import weakref
+from concurrent.futures import ThreadPoolExecutor
 
 import asdf
 import numpy as np
 import pytest
 from asdf.exceptions import ValidationError
 
+from stdatamodels import validate
 from stdatamodels.exceptions import ValidationWarning
 
 from .models import BasicModel, FitsModel, RequiredModel, ValidationModel
@@ -411,3 +414,254 @@ def test_validation_memory_leak():
 
     # verify that the weakref fails to resolve
     assert new_array_ref() is None
+
+
+def test_batch_update(monkeypatch):
+    model = ValidationModel(strict_validation=True)
+    model.meta.string_attribute = "foo"
+
+    calls = []
+    check_value = validate._check_value
+    monkeypatch.setattr(
+        validate, "_check_value", lambda *args: calls.append(args) or check_value(*args)
+    )
+    with model.batch_update():
+        model.meta.string_attribute = "bar"
+        model.meta.integer_attribute = 1
+        model.meta.object_attribute.string_attribute = "baz"
+        with model.batch_update():
+            model.meta.integer_attribute = 2
+        assert calls == []
+        assert model.meta.integer_attribute == 2
+
+    # meta is validated once for both of its attributes
+    assert len(calls) == 2
+    assert model.meta.string_attribute == "bar"
+    assert model.meta.integer_attribute == 2
+    assert model.meta.object_attribute.string_attribute == "baz"
+
+
+@pytest.mark.parametrize(
+    "strict_validation, pass_invalid_values, expected_context_manager, value",
+    [
+        (False, False, pytest.warns(ValidationWarning, match="string_attribute"), "foo"),
+        (False, True, pytest.warns(ValidationWarning, match="string_attribute"), 42),
+        (True, False, pytest.raises(ValidationError, match="string_attribute"), "foo"),
+        (True, True, pytest.raises(ValidationError, match="string_attribute"), "foo"),
+    ],
+)
+def test_batch_update_invalid(
+    strict_validation, pass_invalid_values, expected_context_manager, value
+):
+    model = ValidationModel(
+        strict_validation=strict_validation, pass_invalid_values=pass_invalid_values
+    )
+    model.meta.string_attribute = "foo"
+
+    with expected_context_manager:
+        with model.batch_update():
+            model.meta.string_attribute = 42
+            model.meta.integer_attribute = 1
+            model.meta.object_attribute.string_attribute = 43
+            # invalid values can be read until validated
+            assert model.meta.string_attribute == 42
+    assert model.meta.string_attribute == value
+    assert model.meta.integer_attribute == 1
+    if value == "foo":
+        # was not set before the batch
+        assert "string_attribute" not in model.meta.object_attribute._instance
+    else:
+        assert model.meta.object_attribute.string_attribute == 43
+
+
+def test_batch_update_error_in_block():
+    model = ValidationModel(strict_validation=True)
+    model.meta.string_attribute = "foo"
+
+    with pytest.warns(ValidationWarning, match="string_attribute"):
+        with pytest.raises(KeyError, match="from the block"):
+            with model.batch_update():
+                model.meta.string_attribute = 42
+                model.meta.integer_attribute = 1
+                raise KeyError("from the block")
+    assert model.meta.string_attribute == "foo"
+    assert model.meta.integer_attribute == 1
+
+    # the next batch starts over
+    with model.batch_update():
+        model.meta.integer_attribute = 2
+    assert model._batch_updates is None
+
+
+def test_cached_validators():
+    model = ValidationModel(strict_validation=True)
+    schema = model.meta._schema
+    model.meta.string_attribute = "foo"
+    validator = validate._get_validator(schema, model)
+    assert validator is not None
+    assert validator.ctx is not model._asdf
+
+    # reused by other models, including their errors
+    other = ValidationModel(strict_validation=True)
+    assert validate._get_validator(schema, other) is validator
+    with pytest.raises(ValidationError):
+        other.meta.string_attribute = 42
+    other.validate()
+
+    arrays = ValidationModel(validate_arrays=True)
+    assert validate._get_validator(schema, arrays) is not validator
+
+    # modifiable schemas are not cached
+    model = ValidationModel(schema=copy.deepcopy(model.schema), strict_validation=True)
+    assert validate._get_validator(model.meta._schema, model) is None
+    with pytest.raises(ValidationError):
+        model.meta.string_attribute = 42
+
+
+def test_concurrent_validation():
+    schema = ValidationModel().meta._schema
+    validator = validate._get_validator(schema, ValidationModel())
+
+    def check(i):
+        model = ValidationModel(strict_validation=True)
+        model.meta.string_attribute = f"value {i}"
+        model.meta.list_attribute.append({"string_attribute": f"item {i}"})
+        model.validate()
+        with pytest.raises(ValidationError):
+            model.meta.string_attribute = 1000 + i
+        assert model.meta.string_attribute == f"value {i}"
+        return validate._get_validator(schema, model)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        validators = list(executor.map(check, range(40)))
+    # validators keep state while validating so threads don't share them
+    assert all(v is not None and v is not validator for v in validators)
+
+
+@pytest.mark.parametrize("name", ["_validate_large_literals", "_validate_mapping_keys"])
+def test_validation_without_private_asdf_checks(monkeypatch, name):
+    model = ValidationModel(strict_validation=True)
+    with monkeypatch.context() as m:
+        m.delattr(asdf.schema, name)
+        assert validate._get_tree_validators(model) is None
+
+    # asdf.schema.validate is used instead of the cached validator
+    monkeypatch.setattr(validate, "_get_tree_validators", lambda ctx: None)
+    calls = []
+    asdf_validate = asdf.schema.validate
+    monkeypatch.setattr(
+        asdf.schema,
+        "validate",
+        lambda *args, **kwargs: calls.append(1) or asdf_validate(*args, **kwargs),
+    )
+    model.meta.list_attribute.append({"string_attribute": "bar"})
+    with pytest.raises(ValidationError):
+        model.meta.string_attribute = 42
+    model.validate()
+    assert calls
+
+
+def test_validate_skips_validated_subtrees(monkeypatch):
+    model = ValidationModel(strict_validation=True)
+    model.meta.string_attribute = "foo"
+    model.meta.object_attribute.string_attribute = "bar"
+    model.meta.list_attribute.append({"string_attribute": "baz"})
+    model.validate()
+
+    checked = []
+    check_value = validate._check_value
+    monkeypatch.setattr(
+        validate, "_check_value", lambda *args: checked.append(args[0]) or check_value(*args)
+    )
+    model.validate()
+    # lists are always validated
+    assert checked[-1] == {"meta": {"list_attribute": [{"string_attribute": "baz"}]}}
+
+    model.meta.object_attribute.string_attribute = "qux"
+    model.validate()
+    assert checked[-1]["meta"]["object_attribute"] == {"string_attribute": "qux"}
+    assert "string_attribute" not in checked[-1]["meta"]
+
+    # changes made without going through the model are validated too
+    model._instance["meta"]["string_attribute"] = 42
+    with pytest.raises(ValidationError, match="string_attribute"):
+        model.validate()
+    with pytest.raises(ValidationError, match="string_attribute"):
+        model.validate()
+    model._instance["meta"]["string_attribute"] = "foo"
+    model.validate()
+
+
+def test_validate_rechecks_arrays_changed_in_place():
+    model = BasicModel((4, 4), strict_validation=True, validate_arrays=True)
+    model.validate()
+
+    model.data.shape = (16,)
+    with pytest.raises(ValidationError, match="data"):
+        model.validate()
+    model.data.shape = (4, 4)
+    model.validate()
+
+    model.data.dtype = np.int32
+    with pytest.raises(ValidationError, match="data"):
+        model.validate()
+
+
+@pytest.mark.parametrize(
+    "schema, value, fast",
+    [
+        ({"type": "string"}, "foo", True),
+        ({"type": "string"}, 42, False),
+        ({"type": "integer"}, 42, True),
+        ({"type": "integer"}, True, False),
+        ({"type": "integer"}, 2**64, False),
+        ({"type": "number"}, 4.2, True),
+        ({"type": "number"}, 4, True),
+        ({"type": "number"}, "4.2", False),
+        ({"type": "number"}, np.float32(4.2), False),
+        ({"type": "boolean"}, False, True),
+        ({"type": ["string", "number"]}, 4.2, True),
+        ({"title": "anything", "fits_keyword": "FOO"}, "foo", True),
+        ({"type": "string", "enum": ["A", "B"]}, "A", True),
+        ({"type": "string", "enum": ["A", "B"]}, "C", False),
+        ({"enum": [1, 2]}, 1, False),
+        ({"type": "number", "minimum": 0, "maximum": 1}, 0.5, True),
+        ({"type": "number", "minimum": 0}, -0.5, False),
+        ({"type": "number", "minimum": 0, "exclusiveMinimum": True}, 0, False),
+        ({"type": "number", "maximum": 1, "exclusiveMaximum": True}, 1, False),
+        ({"type": "number", "maximum": 1}, 1, True),
+        ({"type": "string", "minimum": 0}, "foo", True),
+        ({"type": "string", "pattern": "^[A-Z]+$"}, "FOO", True),
+        ({"type": "string", "pattern": "^[A-Z]+$"}, "foo", False),
+        ({"type": "string", "minLength": 2, "maxLength": 3}, "foo", True),
+        ({"type": "string", "maxLength": 2}, "foo", False),
+        ({"type": "string", "tag": "foo"}, "foo", None),
+        ({"anyOf": [{"type": "string"}]}, "foo", None),
+        ({"type": "object"}, "foo", None),
+    ],
+)
+def test_scalar_validator(schema, value, fast):
+    scalar_validator = validate._compile_scalar_validator(schema)
+    if fast is None:
+        assert scalar_validator is None
+        return
+    assert scalar_validator(value) is fast
+    if fast:
+        # accepted values must be valid for the full validator
+        asdf.schema.validate(value, schema=schema, validators=validate._VALIDATORS)
+
+
+def test_scalar_validator_assignment(monkeypatch):
+    model = ValidationModel(strict_validation=True)
+    # the full validator is not used for valid scalars
+    monkeypatch.setattr(validate.yamlutil, "custom_tree_to_tagged_tree", None)
+    model.meta.string_attribute = "foo"
+    model.meta.integer_attribute = 42
+    assert model.meta.string_attribute == "foo"
+    assert model.meta.integer_attribute == 42
+
+    # invalid values are reported by the full validator
+    monkeypatch.undo()
+    with pytest.raises(ValidationError, match="While validating integer_attribute"):
+        model.meta.integer_attribute = "foo"
+    assert model.meta.integer_attribute == 42